@@ -2,97 +2,68 @@ import streamlit as st
 import random
 import uuid
 import copy
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import os
+import datetime
+import game_archive
+import game_engine
+import enemy_inference
+import target_solver
+from game_engine import (
+    STARTING_GOLD, STARTING_STEEL, BASE_GOLD_INCOME, BASE_STEEL_INCOME,
+    FLEET_CAP_ACTIVE, FLEET_CAP_RESERVE, BASE_MAX_HP, UNITS, BUILDINGS,
+)
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Battleship Command v24", layout="wide", page_icon="⚓")
 
-# --- RULES & CONSTANTS ---
-STARTING_GOLD = 150
-STARTING_STEEL = 10
-STARTING_GEMS = 0
-BASE_GOLD_INCOME = 20
-BASE_STEEL_INCOME = 2
-FLEET_CAP_ACTIVE = 7
-FLEET_CAP_RESERVE = 3
-BASE_MAX_HP = 30 
-
-# Unit Stats 
-UNITS = {
-    "Aircraft Carrier": {
-        "gold": 100, "steel": 10, "turns": 3, "hp": 7, "limit": 2, 
-        "desc": "Range 4, 1x(3-10) or 2x(1-5)", 
-        "bonus": "Cannot Move and Attack on the same turn"
-    }, 
-    "Battleship": {
-        "gold": 90,  "steel": 9, "turns": 2, "hp": 13, "limit": 3, 
-        "desc": "Range 3, Dmg 2-7", 
-        "bonus": "Damage Reduction: Torpedoes (3) and Aircraft (1)"
-    }, 
-    "Cruiser": {
-        "gold": 50,  "steel": 5, "turns": 1, "hp": 9,  "limit": 4, 
-        "desc": "Range 2, Dmg 2-4", 
-        "bonus": "Damage Reduction: Submarines (5)"
-    }, 
-    "Destroyer": {
-        "gold": 30,  "steel": 3, "turns": 0, "hp": 5,  "limit": 5, 
-        "desc": "Range 2, Dmg 1-3, Mine Gems", 
-        "bonus": "Damage Reduction: Aircraft (2). Deals 2x Dmg vs Subs & Torpedo Boats."
-    }, 
-    "Torpedo Boat": {
-        "gold": 40,  "steel": 2, "turns": 0, "hp": 3,  "limit": 2, # Updated limit to 2
-        "desc": "Range 1, Torpedo (2-7 dmg)", 
-        "bonus": "Vulnerable to Destroyers (Takes 2x Dmg from them)."
-    }, 
-    "Submarine": {
-        "gold": 40,  "steel": 2, "turns": 0, "hp": 3,  "limit": 2, 
-        "desc": "Torpedo (7 dmg), Hidden", 
-        "bonus": "Immune to Battleships. Cannot attack bases. Invisible until 1 tile away."
-    }, 
-    "Decoy": {
-        "gold": 20,  "steel": 0, "turns": 0, "hp": 1,  "limit": 1, 
-        "desc": "Fake ship placement.", 
-        "bonus": "Destroyed immediately upon reveal."
-    }, 
-}
-
-BUILDINGS = {
-    "Gold Mine": {
-        "gold": 20, "steel": 2, "limit": 4, 
-        "effect": "+10 Gold/turn", 
-        "desc": "Deep earth mining infrastructure to fund the war effort."
-    },
-    "Steel Factory": {
-        "gold": 30, "steel": 1, "limit": 3, 
-        "effect": "+1 Steel/turn", 
-        "desc": "Heavy industrial processing for ship armor and hulls."
-    },
-    "Base Defense": {
-        "gold": 30, "steel": 0, "limit": 2, 
-        "effect": "+1 Bomber (2-4 Dmg)", 
-        "desc": "Scramble interceptors to defend the homeland."
-    },
-    "Shipyard": {
-        "gold": 50, "steel": 3, "limit": 1, 
-        "effect": "Unlocks Repairs", 
-        "desc": "Allows repairing ships (3HP) within 1 tile of base."
-    }
-}
+# --- ANALYTICS EXPORT ---
+EXPORT_DIR = "game_exports"
+EVENT_FLUSH_SIZE = 25
+EVENT_SCHEMA = pa.schema([
+    ("game_id", pa.string()),
+    ("seq", pa.int64()),
+    ("turn", pa.int32()),
+    ("kind", pa.string()),
+    ("actor", pa.string()),
+    ("weapon", pa.string()),
+    ("roll", pa.int32()),
+    ("target", pa.string()),
+    ("gold", pa.int32()),
+    ("steel", pa.int32()),
+    ("gems", pa.int32()),
+    ("undo_to", pa.int64()),
+])
 
 # --- INITIALIZATION ---
-if 'gold' not in st.session_state: st.session_state.gold = STARTING_GOLD
-if 'steel' not in st.session_state: st.session_state.steel = STARTING_STEEL
-if 'gems' not in st.session_state: st.session_state.gems = STARTING_GEMS
-if 'turn' not in st.session_state: st.session_state.turn = 1
-if 'base_hp' not in st.session_state: st.session_state.base_hp = BASE_MAX_HP
-if 'queue' not in st.session_state: st.session_state.queue = [] 
-if 'buildings' not in st.session_state:
-    st.session_state.buildings = {"Gold Mine": 0, "Steel Factory": 0, "Shipyard": 0, "Base Defense": 0}
-if 'logs' not in st.session_state:
-    st.session_state.logs = ["Game Started. Good luck, Commander."]
+if 'gold' not in st.session_state:
+    for key, value in vars(game_engine.new_game()).items():
+        st.session_state[key] = value
 if 'roll_results' not in st.session_state:
     st.session_state.roll_results = {}
 if 'history' not in st.session_state:
     st.session_state.history = []
+if 'game_id' not in st.session_state:
+    st.session_state.game_id = str(uuid.uuid4())
+if 'events' not in st.session_state:
+    st.session_state.events = []
+    st.session_state.event_seq = 0
+    st.session_state.export_part = 0
+if 'turn_snapshots' not in st.session_state:
+    st.session_state.turn_snapshots = []
+if 'enemy_filters' not in st.session_state:
+    st.session_state.enemy_filters = {}
+if 'stats' not in st.session_state:
+    st.session_state.stats = {
+        "damage_by_unit": {},
+        "shots_by_unit": {},
+        "curve": [{"Turn": 1, "Gold": STARTING_GOLD, "Steel": STARTING_STEEL}],
+        "gems_mined": 0,
+        "gems_from_kills": 0,
+    }
 
 # --- UNDO SYSTEM HELPER ---
 def save_state():
@@ -105,7 +76,9 @@ def save_state():
         'queue': copy.deepcopy(st.session_state.queue),
         'buildings': copy.deepcopy(st.session_state.buildings),
         'fleet_list': copy.deepcopy(st.session_state.fleet_list),
-        'enemies': copy.deepcopy(st.session_state.enemies)
+        'enemies': copy.deepcopy(st.session_state.enemies),
+        'stats': copy.deepcopy(st.session_state.stats),
+        'event_seq': st.session_state.event_seq,
     }
     st.session_state.history.append(snapshot)
     if len(st.session_state.history) > 15:  
@@ -123,106 +96,237 @@ def undo():
         st.session_state.buildings = last_state['buildings']
         st.session_state.fleet_list = last_state['fleet_list']
         st.session_state.enemies = last_state['enemies']
+        st.session_state.turn_snapshots = [s for s in st.session_state.turn_snapshots if s['turn'] <= last_state['turn']]
+        # Attack rolls are never part of an undoable action, so their tallies carry over.
+        last_state['stats']['damage_by_unit'] = st.session_state.stats['damage_by_unit']
+        last_state['stats']['shots_by_unit'] = st.session_state.stats['shots_by_unit']
+        st.session_state.stats = last_state['stats']
+        # Exported events are append-only: undo_to is the last seq before the undone action.
+        record_event("undo", undo_to=last_state['event_seq'])
         st.toast("↩️ Action Undone!")
     else:
         st.toast("❌ Nothing to undo!")
 
-# --- DYNAMIC NUMBERING HELPER ---
-def get_next_ship_number(fleet_list, u_type, limit):
-    used = [s['num'] for s in fleet_list if s['type'] == u_type]
-    for i in range(1, limit + 1):
-        if i not in used:
-            return i
-    return limit + 1
+# --- FUNCTIONS ---
+def log(msg):
+    game_engine.log(st.session_state, msg)
 
-def create_player_ship(u_type, status="Active"):
-    num = get_next_ship_number(st.session_state.fleet_list, u_type, UNITS[u_type]["limit"])
-    name_display = f"{u_type} {num}" if u_type != "Decoy" else u_type
-    
-    return {
-        "id": str(uuid.uuid4()), 
-        "type": u_type, 
-        "num": num,
-        "name": name_display,
-        "status": status,
-        "hp": UNITS[u_type]["hp"],
-        "max_hp": UNITS[u_type]["hp"],
-        "mined_this_turn": False
+# --- ANALYTICS HELPERS ---
+def update_stats(event):
+    # Aggregates are folded in one event at a time so the dashboard never rescans history.
+    stats = st.session_state.stats
+    if event['kind'] == "attack":
+        stats['damage_by_unit'][event['actor']] = stats['damage_by_unit'].get(event['actor'], 0) + event['roll']
+        stats['shots_by_unit'][event['actor']] = stats['shots_by_unit'].get(event['actor'], 0) + 1
+    elif event['kind'] == "mine":
+        stats['gems_mined'] += 1
+    elif event['kind'] == "enemy_sunk" and event['roll']:
+        stats['gems_from_kills'] += event['roll']
+    elif event['kind'] == "end_turn":
+        stats['curve'].append({"Turn": event['turn'] + 1, "Gold": event['gold'], "Steel": event['steel']})
+
+def record_event(kind, actor=None, weapon=None, roll=None, target=None, turn=None, undo_to=None):
+    st.session_state.event_seq += 1
+    event = {
+        "game_id": st.session_state.game_id,
+        "seq": st.session_state.event_seq,
+        "turn": st.session_state.turn if turn is None else turn,
+        "kind": kind,
+        "actor": actor,
+        "weapon": weapon,
+        "roll": roll,
+        "target": target,
+        "gold": st.session_state.gold,
+        "steel": st.session_state.steel,
+        "gems": st.session_state.gems,
+        "undo_to": undo_to,
     }
+    st.session_state.events.append(event)
+    update_stats(event)
+    if len(st.session_state.events) >= EVENT_FLUSH_SIZE:
+        flush_events()
+
+def flush_events():
+    # Each flush appends one Parquet part to the game's directory; read them back with pq.read_table(dir).
+    if not st.session_state.events:
+        return
+    game_dir = os.path.join(EXPORT_DIR, st.session_state.game_id)
+    os.makedirs(game_dir, exist_ok=True)
+    st.session_state.export_part += 1
+    table = pa.Table.from_pylist(st.session_state.events, schema=EVENT_SCHEMA)
+    pq.write_table(table, os.path.join(game_dir, f"events-{st.session_state.export_part:05d}.parquet"))
+    st.session_state.events = []
 
-if 'fleet_list' not in st.session_state:
-    st.session_state.fleet_list = []
-    st.session_state.fleet_list.append(create_player_ship("Destroyer", "Active"))
+# --- ARCHIVE HELPERS ---
+@st.cache_resource
+def get_archive_writer():
+    return game_archive.ArchiveWriter(game_archive.ARCHIVE_PATH)
 
-# Enemy State Initialization
-if 'enemies' not in st.session_state:
-    st.session_state.enemies = {
-        "Enemy 1": {"base_hp": 30, "ships": []},
-        "Enemy 2": {"base_hp": 30, "ships": []},
-        "Enemy 3": {"base_hp": 30, "ships": []}
+@st.cache_resource
+def get_archive_conn():
+    return game_archive.connect(game_archive.ARCHIVE_PATH)
+
+def take_snapshot():
+    return {
+        'turn': st.session_state.turn,
+        'gold': st.session_state.gold,
+        'steel': st.session_state.steel,
+        'gems': st.session_state.gems,
+        'base_hp': st.session_state.base_hp,
+        'queue': copy.deepcopy(st.session_state.queue),
+        'buildings': copy.deepcopy(st.session_state.buildings),
+        'fleet_list': copy.deepcopy(st.session_state.fleet_list),
+        'enemies': copy.deepcopy(st.session_state.enemies)
     }
 
-# --- FUNCTIONS ---
-def log(msg):
-    st.session_state.logs.insert(0, f"Turn {st.session_state.turn}: {msg}")
+def archive_game(outcome):
+    record_event("game_over", target=outcome)
+    flush_events()
+    game_dir = os.path.join(EXPORT_DIR, st.session_state.game_id)
+    get_archive_writer().submit({
+        'game_id': st.session_state.game_id,
+        'outcome': outcome,
+        'final_state': take_snapshot(),
+        'snapshots': st.session_state.turn_snapshots,
+        'events': game_archive.drop_undone(pq.read_table(game_dir).to_pylist()) if os.path.isdir(game_dir) else [],
+    })
+
+def resolve_target(label):
+    # Maps the Combat tab target label to (label, unit type), e.g. ("Enemy 2 · Cruiser 1", "Cruiser").
+    if not label or label == "Unspecified":
+        return None, None
+    for e_name, e_data in st.session_state.enemies.items():
+        if label == f"{e_name} Base":
+            return label, "Base"
+        for ship in e_data['ships']:
+            if label == f"{e_name} · {ship['name']}":
+                return label, ship['type']
+    return label, None
+
+def record_attack(actor, weapon, dmg):
+    target, target_type = resolve_target(st.session_state.get('combat_target'))
+    if actor == "Destroyer" and target_type in ("Submarine", "Torpedo Boat"):
+        dmg *= 2
+    record_event("attack", actor=actor, weapon=weapon, roll=dmg, target=target)
 
 def end_turn():
     save_state()
-    gold_gain = BASE_GOLD_INCOME + (st.session_state.buildings["Gold Mine"] * 10)
-    steel_gain = BASE_STEEL_INCOME + (st.session_state.buildings["Steel Factory"] * 1)
-    
-    st.session_state.gold += gold_gain
-    st.session_state.steel += steel_gain
-    
-    completed = []
-    new_queue = []
-    for item in st.session_state.queue:
-        item['turns_left'] -= 1
-        if item['turns_left'] <= 0:
-            completed.append(item['type'])
-            active_count = sum(1 for s in st.session_state.fleet_list if s['status'] == "Active")
-            status = "Active" if active_count < FLEET_CAP_ACTIVE else "Reserve"
-            st.session_state.fleet_list.append(create_player_ship(item['type'], status))
-        else:
-            new_queue.append(item)
-    
-    st.session_state.queue = new_queue
-    
-    for ship in st.session_state.fleet_list:
-        if ship['type'] == 'Destroyer':
-            ship['mined_this_turn'] = False
-    
-    log(f"Collected +{gold_gain} Gold, +{steel_gain} Steel.")
-    if completed:
-        log(f"✅ Deployment Complete: {', '.join(completed)}")
-        
-    st.session_state.turn += 1
+    ending_turn = st.session_state.turn
+    gold_gain, steel_gain, completed = game_engine.end_turn(st.session_state)
+    for u_type in completed:
+        record_event("deployed", actor=u_type, turn=ending_turn)
+    record_event("end_turn", roll=gold_gain, turn=ending_turn)
+    flush_events()
+    st.session_state.turn_snapshots.append(take_snapshot())
 
 def delete_ship(ship_id):
     save_state()
-    st.session_state.fleet_list = [s for s in st.session_state.fleet_list if s['id'] != ship_id]
-    log("Ship sunk/scrapped.")
+    ship = game_engine.delete_ship(st.session_state, ship_id)
+    record_event("ship_lost", actor=ship['type'], target=ship['name'])
 
 def toggle_ship_status(ship_id):
     save_state()
-    ship = next((s for s in st.session_state.fleet_list if s['id'] == ship_id), None)
-    if not ship: return
+    try:
+        game_engine.toggle_ship_status(st.session_state, ship_id)
+    except ValueError as e:
+        st.error(str(e))
+
+def build_hp_table():
+    # One row per base and ship on every side, for the bulk Damage Control editor.
+    rows = [{"Side": "You", "Unit": "Base", "HP": f"{st.session_state.base_hp} / {BASE_MAX_HP}", "enemy": "", "ship_id": ""}]
+    for ship in st.session_state.fleet_list:
+        rows.append({"Side": f"You ({ship['status']})", "Unit": ship['name'], "HP": f"{ship['hp']} / {ship['max_hp']}", "enemy": "", "ship_id": ship['id']})
+    for e_name, e_data in st.session_state.enemies.items():
+        rows.append({"Side": e_name, "Unit": "Base", "HP": f"{e_data['base_hp']} / {BASE_MAX_HP}", "enemy": e_name, "ship_id": ""})
+        for ship in e_data['ships']:
+            rows.append({"Side": e_name, "Unit": ship['name'], "HP": f"{ship['hp']} / {ship['max_hp']}", "enemy": e_name, "ship_id": ship['id']})
+    df = pd.DataFrame(rows)
+    df["Δ HP"] = 0
+    df["Sunk"] = False
+    df["My Kill"] = False
+    return df
 
-    active_count = sum(1 for s in st.session_state.fleet_list if s['status'] == "Active")
-    reserve_count = sum(1 for s in st.session_state.fleet_list if s['status'] == "Reserve")
+# --- ECONOMY FORECAST ---
+FORECAST_ITEMS = list(BUILDINGS.keys()) + list(UNITS.keys())
+FORECAST_DEFAULT_PLANS = [
+    {"Plan": "2 Gold Mines now", "Gold Mine": 2},
+    {"Plan": "Battleship now", "Battleship": 1},
+    {"Plan": "Steel Factory + Cruiser", "Steel Factory": 1, "Cruiser": 1},
+]
 
-    if ship['status'] == "Active":
-        if reserve_count < FLEET_CAP_RESERVE:
-            ship['status'] = "Reserve"
-            log(f"⚓ {ship['name']} moved to Reserve.")
-        else:
-            st.error("Reserve Fleet Full!")
-    elif ship['status'] == "Reserve":
-        if active_count < FLEET_CAP_ACTIVE:
-            ship['status'] = "Active"
-            log(f"⚔️ {ship['name']} deployed to Active.")
-        else:
-            st.error("Active Fleet Full!")
+@st.cache_data(max_entries=64)
+def forecast_economy(plans, horizon, gold, steel, gems, buildings, fleet_counts, queue, mine_gems, mining_slots=FLEET_CAP_ACTIVE):
+    # plans: tuple of per-item purchase counts (ordered like FORECAST_ITEMS), all bought this turn.
+    # Every plan is projected at once: arrays are shaped (plan, [unit,] step) with step 0 = now.
+    counts = np.array(plans, dtype=np.int64).reshape(len(plans), len(FORECAST_ITEMS))
+    n_build = len(BUILDINGS)
+    b_counts, u_counts = counts[:, :n_build], counts[:, n_build:]
+    steps = np.arange(horizon + 1)
+
+    item_gold = np.array([BUILDINGS[i]['gold'] for i in BUILDINGS] + [UNITS[u]['gold'] for u in UNITS])
+    item_steel = np.array([BUILDINGS[i]['steel'] for i in BUILDINGS] + [UNITS[u]['steel'] for u in UNITS])
+    owned_b = np.array([buildings.get(b, 0) for b in BUILDINGS])
+    total_b = owned_b + b_counts
+
+    # Same income formula as end_turn(), applied once per future turn.
+    mines = total_b[:, list(BUILDINGS).index("Gold Mine")]
+    factories = total_b[:, list(BUILDINGS).index("Steel Factory")]
+    gold_income = BASE_GOLD_INCOME + mines * 10
+    steel_income = BASE_STEEL_INCOME + factories * 1
+    gold_proj = (gold - counts @ item_gold)[:, None] + gold_income[:, None] * steps[None, :]
+    steel_proj = (steel - counts @ item_steel)[:, None] + steel_income[:, None] * steps[None, :]
+
+    # Fleet: current ships, then queued builds and new orders as they finish their build turns.
+    build_turns = np.array([UNITS[u]['turns'] for u in UNITS])
+    fleet0 = np.array([fleet_counts.get(u, 0) for u in UNITS])
+    queued = np.zeros((len(UNITS), horizon + 1), dtype=np.int64)
+    for u_type, turns_left in queue:
+        queued[list(UNITS).index(u_type), max(turns_left, 0):] += 1
+    arrived = (steps[None, :] >= build_turns[:, None])
+    fleet_proj = fleet0[None, :, None] + queued[None, :, :] + u_counts[:, :, None] * arrived[None, :, :]
+
+    # Optional gem income: only Active Destroyers mine, so at most mining_slots of those afloat
+    # (Active slots not held by other ship types) mine once per turn before End Turn.
+    gems_proj = np.full((len(plans), horizon + 1), gems, dtype=np.int64)
+    if mine_gems:
+        destroyers = np.minimum(fleet_proj[:, list(UNITS).index("Destroyer"), :-1], mining_slots)
+        gems_proj[:, 1:] += np.cumsum(destroyers, axis=1)
+
+    limits_b = np.array([BUILDINGS[b]['limit'] for b in BUILDINGS])
+    limits_u = np.array([UNITS[u]['limit'] for u in UNITS])
+    ships_total = fleet0 + queued[:, -1] + u_counts
+    within_limits = (total_b <= limits_b).all(axis=1) & (ships_total <= limits_u).all(axis=1) \
+        & (ships_total.sum(axis=1) <= FLEET_CAP_ACTIVE + FLEET_CAP_RESERVE)
+    affordable = (gold_proj[:, 0] >= 0) & (steel_proj[:, 0] >= 0)
+
+    return {
+        "gold": gold_proj, "steel": steel_proj, "gems": gems_proj, "fleet": fleet_proj,
+        "affordable": affordable, "within_limits": within_limits,
+    }
+
+# --- ENEMY INFERENCE ---
+def enemy_estimate(e_name):
+    # Filters persist across reruns and only step forward. Anything an undo can take back
+    # (a turn, a sinking, a sighting) starts that enemy's filter over from turn 1.
+    enemy_data = st.session_state.enemies[e_name]
+    sunk = list(enemy_data.get('sunk', []))
+    observed = {}
+    for ship in enemy_data['ships']:
+        observed[ship['type']] = observed.get(ship['type'], 0) + 1
+    sightings = {u: observed.get(u, 0) + sunk.count(u) for u in UNITS}
+
+    entry = st.session_state.enemy_filters.get(e_name)
+    if (entry is None or entry['filter'].turn > st.session_state.turn or sunk[:len(entry['sunk'])] != entry['sunk']
+            or any(sightings[u] < entry['sightings'][u] for u in UNITS)):
+        entry = {"filter": enemy_inference.EnemyFleetFilter(), "signature": None, "sunk": [], "sightings": dict.fromkeys(UNITS, 0)}
+        st.session_state.enemy_filters[e_name] = entry
+
+    signature = (st.session_state.turn, tuple(sorted(observed.items())), len(sunk))
+    if entry['signature'] != signature:
+        entry['filter'].advance_to(st.session_state.turn)
+        entry['filter'].observe(observed, sunk)
+        entry.update(signature=signature, sunk=sunk, sightings=sightings)
+    return entry['filter'].summary(observed)
 
 # --- MAIN UI ---
 st.title("⚓ Battleship Command v24")
@@ -251,12 +355,47 @@ with col5:
 st.divider()
 
 # Tabs (Added Rules Tab)
-tab_combat, tab_health, tab_ships, tab_enemy, tab_shop, tab_infra, tab_rules = st.tabs([
-    "⚔️ Combat", "🏥 Damage Control", "⚓ Fleet", "🔴 Enemy", "💎 Shop", "🏗️ Infrastructure", "📜 Rules"
+tab_combat, tab_health, tab_ships, tab_enemy, tab_shop, tab_infra, tab_stats, tab_archive, tab_rules = st.tabs([
+    "⚔️ Combat", "🏥 Damage Control", "⚓ Fleet", "🔴 Enemy", "💎 Shop", "🏗️ Infrastructure", "📊 Stats", "🗄️ Archive", "📜 Rules"
 ])
 
 # --- TAB 1: COMBAT ---
 with tab_combat:
+    target_options = ["Unspecified"]
+    for e_name, e_data in st.session_state.enemies.items():
+        target_options.append(f"{e_name} Base")
+        target_options += [f"{e_name} · {ship['name']}" for ship in e_data['ships']]
+    st.selectbox("🎯 Current Target (for analytics)", target_options, key="combat_target")
+
+    with st.expander("🧮 Fire Plan"):
+        all_shooters = target_solver.fleet_shooters(st.session_state)
+        all_targets = target_solver.enemy_targets(st.session_state)
+        fp1, fp2 = st.columns(2)
+        with fp1:
+            fp_shooters = st.multiselect("Ready to Fire", [s['name'] for s in all_shooters], default=[s['name'] for s in all_shooters])
+        with fp2:
+            fp_targets = st.multiselect("In Range", [t['label'] for t in all_targets], default=[t['label'] for t in all_targets])
+        fp_objective = st.radio("Maximize", ["Expected Kills", "Expected Gems"], horizontal=True)
+        if st.button("Plan Fire", disabled=not fp_shooters or not fp_targets):
+            st.session_state.fire_plan = target_solver.solve(
+                [s for s in all_shooters if s['name'] in fp_shooters],
+                [t for t in all_targets if t['label'] in fp_targets],
+                "kills" if fp_objective == "Expected Kills" else "gems",
+            )
+        plan = st.session_state.get('fire_plan')
+        if plan:
+            pm1, pm2 = st.columns(2)
+            pm1.metric("Expected Kills", f"{plan['expected_kills']:.2f}")
+            pm2.metric("Expected Gems", f"{plan['expected_gems']:.2f}")
+            st.dataframe(pd.DataFrame([
+                {"Target": a['target'], "Shooters": ", ".join(name for name, _ in a['shooters']),
+                 "P(Kill)": f"{a['p_kill']:.0%}", "Exp. Damage": round(a['expected_damage'], 1)}
+                for a in plan['assignments']
+            ]), hide_index=True)
+            if plan['idle']:
+                st.caption("Hold fire: " + ", ".join(plan['idle']))
+            st.caption("Exact odds from each weapon's rolls, including damage reductions, Destroyer 2x and Submarine rules. Re-plan after the board changes.")
+
     st.markdown("### ⛰️ Mountain Operations")
     available_miners = [s for s in st.session_state.fleet_list if s['type'] == 'Destroyer' and s['status'] == 'Active' and not s.get('mined_this_turn', False)]
     
@@ -265,9 +404,8 @@ with tab_combat:
         st.write(f"**Available Destroyers to Mine:** {len(available_miners)}")
         if st.button("⛏️ Mine Mountain (Uses 1 Destroyer)", disabled=len(available_miners) == 0):
             save_state()
-            available_miners[0]['mined_this_turn'] = True
-            st.session_state.gems += 1
-            log(f"{available_miners[0]['name']} extracted 1 Gem from the mountains.")
+            game_engine.mine_gem(st.session_state)
+            record_event("mine", actor="Destroyer", roll=1, target="Mountain")
             st.toast("Mined 1 Gem!")
             st.rerun()
     with m_col2:
@@ -285,18 +423,21 @@ with tab_combat:
                 dmg = random.randint(3, 10)
                 st.session_state.roll_results['carrier'] = f"🎯 Carrier Hit: **{dmg}**"
                 log(f"Carrier Focused: {dmg}")
+                record_attack("Aircraft Carrier", "Aircraft", dmg)
     else:
         with c_col1:
             if st.button("Sqd A"):
                 dmg = random.randint(1, 5)
                 st.session_state.roll_results['carrier_a'] = f"🛩️ A: **{dmg}**"
                 log(f"Carrier A: {dmg}")
+                record_attack("Aircraft Carrier", "Aircraft", dmg)
             if 'carrier_a' in st.session_state.roll_results: st.caption(st.session_state.roll_results['carrier_a'])
         with c_col2:
             if st.button("Sqd B"):
                 dmg = random.randint(1, 5)
                 st.session_state.roll_results['carrier_b'] = f"🛩️ B: **{dmg}**"
                 log(f"Carrier B: {dmg}")
+                record_attack("Aircraft Carrier", "Aircraft", dmg)
             if 'carrier_b' in st.session_state.roll_results: st.caption(st.session_state.roll_results['carrier_b'])
             
     if "Focused" in c_mode and 'carrier' in st.session_state.roll_results:
@@ -314,6 +455,7 @@ with tab_combat:
             dmg = random.randint(2, 4)
             st.session_state.roll_results['base'] = f"🛡️ Intercept: **{dmg}**"
             log(f"Base Defense: {dmg}")
+            record_attack("Base Defense", "Bomber", dmg)
         if 'base' in st.session_state.roll_results: st.info(st.session_state.roll_results['base'])
     else: 
         b_mode = st.radio("Defense Mode", ["Focused (2x combined)", "Split (2x 2-4 Dmg)"], horizontal=True)
@@ -325,6 +467,7 @@ with tab_combat:
                     dmg = random.randint(2, 4) + random.randint(2, 4)
                     st.session_state.roll_results['base_focus'] = f"🛡️ Combined Hit: **{dmg}**"
                     log(f"Base Focused: {dmg}")
+                    record_attack("Base Defense", "Bomber", dmg)
             if 'base_focus' in st.session_state.roll_results: st.info(st.session_state.roll_results['base_focus'])
         else:
             with bd1:
@@ -332,12 +475,14 @@ with tab_combat:
                     dmg = random.randint(2, 4)
                     st.session_state.roll_results['base_1'] = f"🛡️ B1: **{dmg}**"
                     log(f"Base B1: {dmg}")
+                    record_attack("Base Defense", "Bomber", dmg)
                 if 'base_1' in st.session_state.roll_results: st.caption(st.session_state.roll_results['base_1'])
             with bd2:
                 if st.button("Bomber 2"):
                     dmg = random.randint(2, 4)
                     st.session_state.roll_results['base_2'] = f"🛡️ B2: **{dmg}**"
                     log(f"Base B2: {dmg}")
+                    record_attack("Base Defense", "Bomber", dmg)
                 if 'base_2' in st.session_state.roll_results: st.caption(st.session_state.roll_results['base_2'])
 
     st.divider()
@@ -349,16 +494,19 @@ with tab_combat:
             dmg = random.randint(2, 7)
             st.session_state.roll_results['bb'] = f"💥 **{dmg}**"
             log(f"Battleship Fired: {dmg}")
+            record_attack("Battleship", "Guns", dmg)
     with col_surf2:
         if st.button("🔫 Cruiser"):
             dmg = random.randint(2, 4)
             st.session_state.roll_results['cr'] = f"🔫 **{dmg}**"
             log(f"Cruiser Fired: {dmg}")
+            record_attack("Cruiser", "Guns", dmg)
     with col_surf3:
         if st.button("🔫 Destroyer"):
             dmg = random.randint(1, 3)
             st.session_state.roll_results['dd'] = f"🔫 **{dmg}** (2x: **{dmg * 2}** vs Sub/TB)"
             log(f"Destroyer Fired: {dmg} (or {dmg * 2} vs Sub/Torp Boat)")
+            record_attack("Destroyer", "Guns", dmg)
             
     if 'bb' in st.session_state.roll_results: st.caption(f"BB (2-7): {st.session_state.roll_results['bb']}")
     if 'cr' in st.session_state.roll_results: st.caption(f"CA (2-4): {st.session_state.roll_results['cr']}")
@@ -372,10 +520,12 @@ with tab_combat:
             dmg = random.randint(2, 7)
             st.session_state.roll_results['tb_torp'] = f"💥 **{dmg}** Damage"
             log(f"Torpedo Boat Fired: {dmg} Dmg")
+            record_attack("Torpedo Boat", "Torpedo", dmg)
     with t2:
         if st.button("🌊 Sub Torp (7)"): 
             st.session_state.roll_results['sub_torp'] = f"💥 **7** Damage"
             log("Submarine Torpedo Fired (7 Dmg)")
+            record_attack("Submarine", "Torpedo", 7)
 
     if 'tb_torp' in st.session_state.roll_results: st.caption(f"TB: {st.session_state.roll_results['tb_torp']}")
     if 'sub_torp' in st.session_state.roll_results: st.caption(f"Sub: {st.session_state.roll_results['sub_torp']}")
@@ -384,66 +534,134 @@ with tab_combat:
 # --- TAB 2: HEALTH TRACKER ---
 with tab_health:
     st.subheader("🏥 Damage Control Center")
+    bulk_mode = st.toggle("📝 Bulk Edit Mode", key="bulk_hp_mode", help="Edit every ship and base (yours and tracked enemies) in one table and apply all changes with a single submit.")
     
-    bh_col1, bh_col2 = st.columns([1, 3])
-    with bh_col1:
-        st.metric("Base HP", f"{st.session_state.base_hp} / {BASE_MAX_HP}")
-    with bh_col2:
-        st.write("") 
-        st.progress(st.session_state.base_hp / BASE_MAX_HP)
-        hb1, hb2, hb3 = st.columns(3)
-        if hb1.button("➖ Hit (-1)", key="b_minus"): 
-            save_state()
-            st.session_state.base_hp = max(0, st.session_state.base_hp - 1)
-            st.rerun()
-        if hb2.button("💥 Crit (-5)", key="b_crit"): 
-            save_state()
-            st.session_state.base_hp = max(0, st.session_state.base_hp - 5)
-            st.rerun()
-        if hb3.button("➕ Repair (+1)", key="b_plus"):
-            save_state()
-            st.session_state.base_hp = min(BASE_MAX_HP, st.session_state.base_hp + 1)
-            st.rerun()
+    if bulk_mode:
+        hp_table = build_hp_table()
+        replaced = 3 + 4 * len([s for s in st.session_state.fleet_list if s['status'] == "Active"]) \
+            + sum(2 + 4 * len(e['ships']) for e in st.session_state.enemies.values())
+        st.caption(f"Enter HP changes (e.g. -3, +1) and tick sinkings, then apply once. Replaces {replaced} buttons and their reruns.")
+        
+        with st.form(f"bulk_hp_form_{st.session_state.get('bulk_hp_version', 0)}"):
+            edited = st.data_editor(
+                hp_table,
+                hide_index=True,
+                use_container_width=True,
+                disabled=["Side", "Unit", "HP"],
+                column_config={
+                    "enemy": None,
+                    "ship_id": None,
+                    "Δ HP": st.column_config.NumberColumn("Δ HP", step=1, default=0),
+                    "Sunk": st.column_config.CheckboxColumn("Sunk", default=False),
+                    "My Kill": st.column_config.CheckboxColumn("My Kill", help="Enemy sunk by you (+1 Gem)", default=False),
+                },
+            )
+            submitted = st.form_submit_button("Apply Changes", type="primary")
+        
+        if submitted:
+            # A cleared Δ HP cell comes back as NaN; treat it as no change.
+            edited["Δ HP"] = pd.to_numeric(edited["Δ HP"], errors="coerce").fillna(0).astype(int)
+            rows = edited.to_dict("records")
+            # "My Kill" only means something for an enemy ship, and it implies the ship sank.
+            bad_kills = [f"{row['Side']} · {row['Unit']}" for row in rows if row['My Kill'] and not (row['enemy'] and row['ship_id'])]
+            changes = [
+                {"enemy": row['enemy'] or None, "ship_id": row['ship_id'] or None, "delta": row['Δ HP'],
+                 "sunk": bool(row['Sunk'] or row['My Kill']), "reward": bool(row['My Kill'])}
+                for row in rows
+                if row['Δ HP'] != 0 or row['Sunk'] or row['My Kill']
+            ]
+            if bad_kills:
+                st.error("My Kill only applies to enemy ships: " + ", ".join(bad_kills))
+            elif changes:
+                save_state()
+                try:
+                    applied = game_engine.apply_hp_changes(st.session_state, changes)
+                except ValueError as e:
+                    st.session_state.history.pop()
+                    st.error(str(e))
+                else:
+                    for a in applied:
+                        ship = a['ship']
+                        if ship is None:
+                            target = f"{a['enemy']} Base" if a['enemy'] else "My Base"
+                        else:
+                            target = f"{a['enemy']} · {ship['name']}" if a['enemy'] else ship['name']
+                        actor = ship['type'] if ship else "Base"
+                        if a['kind'] == "hp":
+                            record_event("hp", actor=actor, roll=a['delta'], target=target)
+                        elif a['kind'] == "ship_lost":
+                            record_event("ship_lost", actor=actor, target=target)
+                        else:
+                            record_event("enemy_sunk", actor=actor, roll=int(a['reward']), target=target)
+                    log(f"Bulk Damage Control: {len(changes)} changes applied.")
+                    st.session_state.bulk_hp_version = st.session_state.get('bulk_hp_version', 0) + 1
+                    st.rerun()
+    else:
+        bh_col1, bh_col2 = st.columns([1, 3])
+        with bh_col1:
+            st.metric("Base HP", f"{st.session_state.base_hp} / {BASE_MAX_HP}")
+        with bh_col2:
+            st.write("") 
+            st.progress(st.session_state.base_hp / BASE_MAX_HP)
+            hb1, hb2, hb3 = st.columns(3)
+            if hb1.button("➖ Hit (-1)", key="b_minus"): 
+                save_state()
+                game_engine.adjust_base_hp(st.session_state, -1)
+                record_event("hp", actor="Base", roll=-1, target="My Base")
+                st.rerun()
+            if hb2.button("💥 Crit (-5)", key="b_crit"): 
+                save_state()
+                game_engine.adjust_base_hp(st.session_state, -5)
+                record_event("hp", actor="Base", roll=-5, target="My Base")
+                st.rerun()
+            if hb3.button("➕ Repair (+1)", key="b_plus"):
+                save_state()
+                game_engine.adjust_base_hp(st.session_state, 1)
+                record_event("hp", actor="Base", roll=1, target="My Base")
+                st.rerun()
 
-    st.divider()
+        st.divider()
     
-    st.markdown("#### Fleet Status")
-    active_ships = [s for s in st.session_state.fleet_list if s['status'] == "Active"]
+        st.markdown("#### Fleet Status")
+        active_ships = [s for s in st.session_state.fleet_list if s['status'] == "Active"]
     
-    if not active_ships:
-        st.info("No Active Ships to track.")
-    else:
-        for ship in active_ships:
-            with st.container(border=True):
-                hc1, hc2, hc3 = st.columns([2, 3, 2])
-                with hc1:
-                    st.markdown(f"**{ship['name']}**")
-                    st.caption(UNITS[ship['type']]['desc'])
-                    st.markdown(f"*{UNITS[ship['type']]['bonus']}*") 
+        if not active_ships:
+            st.info("No Active Ships to track.")
+        else:
+            for ship in active_ships:
+                with st.container(border=True):
+                    hc1, hc2, hc3 = st.columns([2, 3, 2])
+                    with hc1:
+                        st.markdown(f"**{ship['name']}**")
+                        st.caption(UNITS[ship['type']]['desc'])
+                        st.markdown(f"*{UNITS[ship['type']]['bonus']}*") 
                     
-                    if ship['hp'] <= 0: st.error("DESTROYED")
-                    elif ship['hp'] <= ship['max_hp'] * 0.3: st.warning("CRITICAL")
-                    else: st.success("OPERATIONAL")
-                with hc2:
-                    pct = max(0.0, ship['hp'] / ship['max_hp'])
-                    st.progress(pct, text=f"{ship['hp']} / {ship['max_hp']} HP")
-                with hc3:
-                    sub1, sub2, sub3, sub4 = st.columns(4)
-                    if sub1.button("-1", key=f"dmg_{ship['id']}"):
-                        save_state()
-                        ship['hp'] = max(0, ship['hp'] - 1)
-                        st.rerun()
-                    if sub2.button("-3", key=f"crit_{ship['id']}"):
-                        save_state()
-                        ship['hp'] = max(0, ship['hp'] - 3)
-                        st.rerun()
-                    if sub3.button("+1", key=f"rep_{ship['id']}"):
-                        save_state()
-                        ship['hp'] = min(ship['max_hp'], ship['hp'] + 1)
-                        st.rerun()
-                    if sub4.button("☠️", key=f"kill_hp_{ship['id']}", help="Mark as Sunk"):
-                        delete_ship(ship['id'])
-                        st.rerun()
+                        if ship['hp'] <= 0: st.error("DESTROYED")
+                        elif ship['hp'] <= ship['max_hp'] * 0.3: st.warning("CRITICAL")
+                        else: st.success("OPERATIONAL")
+                    with hc2:
+                        pct = max(0.0, ship['hp'] / ship['max_hp'])
+                        st.progress(pct, text=f"{ship['hp']} / {ship['max_hp']} HP")
+                    with hc3:
+                        sub1, sub2, sub3, sub4 = st.columns(4)
+                        if sub1.button("-1", key=f"dmg_{ship['id']}"):
+                            save_state()
+                            game_engine.adjust_ship_hp(ship, -1)
+                            record_event("hp", actor=ship['type'], roll=-1, target=ship['name'])
+                            st.rerun()
+                        if sub2.button("-3", key=f"crit_{ship['id']}"):
+                            save_state()
+                            game_engine.adjust_ship_hp(ship, -3)
+                            record_event("hp", actor=ship['type'], roll=-3, target=ship['name'])
+                            st.rerun()
+                        if sub3.button("+1", key=f"rep_{ship['id']}"):
+                            save_state()
+                            game_engine.adjust_ship_hp(ship, 1)
+                            record_event("hp", actor=ship['type'], roll=1, target=ship['name'])
+                            st.rerun()
+                        if sub4.button("☠️", key=f"kill_hp_{ship['id']}", help="Mark as Sunk"):
+                            delete_ship(ship['id'])
+                            st.rerun()
 
 
 # --- TAB 3: FLEET COMMAND ---
@@ -504,29 +722,17 @@ with tab_ships:
             if rush_turns > 0:
                 st.info(f"Rushing {rush_turns} turns for **{rush_turns * 2} Gems**.")
         
-        can_afford_g = st.session_state.gold >= s['gold']
-        can_afford_s = st.session_state.steel >= s['steel']
-        can_afford_gems = st.session_state.gems >= (rush_turns * 2)
         is_maxed = total_u >= limit_u
         
         if st.button(f"Commission {u}", type="primary", disabled=is_maxed):
-            if can_afford_g and can_afford_s and can_afford_gems:
+            error = game_engine.commission_error(st.session_state, u, rush_turns)
+            if error is None:
                 save_state()
-                st.session_state.gold -= s['gold']
-                st.session_state.steel -= s['steel']
-                st.session_state.gems -= (rush_turns * 2)
-                
-                final_turns = s['turns'] - rush_turns
-                
-                if final_turns == 0:
-                    st.session_state.fleet_list.append(create_player_ship(u, "Active"))
-                    log(f"Rushed construction of {u} instantly!")
-                else:
-                    st.session_state.queue.append({'type': u, 'turns_left': final_turns})
-                    log(f"Started construction of {u} ({final_turns} turns remaining).")
+                final_turns = game_engine.commission(st.session_state, u, rush_turns)
+                record_event("commission", actor=u, weapon="Rush" if final_turns == 0 else None, roll=rush_turns * 2)
                 st.rerun()
             else:
-                st.error("Insufficient Funds or Gems!")
+                st.error(error)
         
         if st.session_state.queue:
             st.divider()
@@ -537,9 +743,9 @@ with tab_ships:
 # --- TAB 4: ENEMY TRACKER ---
 with tab_enemy:
     st.subheader("🔴 Enemy Intelligence")
-    e_tabs = st.tabs(["Enemy 1", "Enemy 2", "Enemy 3"])
+    e_tabs = st.tabs(game_engine.ENEMY_NAMES)
     
-    for i, e_name in enumerate(["Enemy 1", "Enemy 2", "Enemy 3"]):
+    for i, e_name in enumerate(game_engine.ENEMY_NAMES):
         with e_tabs[i]:
             enemy_data = st.session_state.enemies[e_name]
             
@@ -548,15 +754,20 @@ with tab_enemy:
             with e_bh1:
                 st.progress(enemy_data['base_hp'] / BASE_MAX_HP)
             with e_bh2:
-                eh1, eh2 = st.columns(2)
-                if eh1.button("-1", key=f"e_bm_{e_name}"):
-                    save_state()
-                    enemy_data['base_hp'] = max(0, enemy_data['base_hp'] - 1)
-                    st.rerun()
-                if eh2.button("+1", key=f"e_bp_{e_name}"):
-                    save_state()
-                    enemy_data['base_hp'] = min(BASE_MAX_HP, enemy_data['base_hp'] + 1)
-                    st.rerun()
+                if st.session_state.get('bulk_hp_mode', False):
+                    st.caption("📝 Bulk edit on")
+                else:
+                    eh1, eh2 = st.columns(2)
+                    if eh1.button("-1", key=f"e_bm_{e_name}"):
+                        save_state()
+                        game_engine.adjust_base_hp(st.session_state, -1, e_name)
+                        record_event("hp", actor="Base", roll=-1, target=f"{e_name} Base")
+                        st.rerun()
+                    if eh2.button("+1", key=f"e_bp_{e_name}"):
+                        save_state()
+                        game_engine.adjust_base_hp(st.session_state, 1, e_name)
+                        record_event("hp", actor="Base", roll=1, target=f"{e_name} Base")
+                        st.rerun()
             
             st.divider()
             
@@ -569,22 +780,14 @@ with tab_enemy:
             curr_e_ships = len([s for s in enemy_data['ships'] if s['type'] == e_unit])
             
             with esp2:
-                default_num = get_next_ship_number(enemy_data['ships'], e_unit, e_limit)
+                default_num = game_engine.get_next_ship_number(enemy_data['ships'], e_unit, e_limit)
                 e_num = st.number_input("ID", min_value=1, max_value=20, value=default_num, key=f"num_{e_name}", label_visibility="collapsed")
                 
             with esp3:
                 if st.button("Spawn", key=f"spawn_{e_name}", disabled=(curr_e_ships >= e_limit)):
                     save_state()
-                    name_display = f"{e_unit} {e_num}" if e_unit != "Decoy" else e_unit
-                    
-                    enemy_data['ships'].append({
-                        "id": str(uuid.uuid4()),
-                        "type": e_unit,
-                        "num": e_num,
-                        "name": name_display,
-                        "hp": UNITS[e_unit]['hp'],
-                        "max_hp": UNITS[e_unit]['hp']
-                    })
+                    e_ship = game_engine.spawn_enemy_ship(st.session_state, e_name, e_unit, e_num)
+                    record_event("spawn", actor=e_unit, target=f"{e_name} · {e_ship['name']}")
                     st.rerun()
             
             if not enemy_data['ships']:
@@ -601,30 +804,52 @@ with tab_enemy:
                             pct = max(0.0, ship['hp'] / ship['max_hp'])
                             st.progress(pct, text=f"{ship['hp']} / {ship['max_hp']} HP")
                         with ec3:
-                            es1, es2, es3, es4 = st.columns(4)
-                            if es1.button("-1", key=f"e_dmg_{ship['id']}"):
-                                save_state()
-                                ship['hp'] = max(0, ship['hp'] - 1)
-                                st.rerun()
-                            if es2.button("+1", key=f"e_rep_{ship['id']}"):
-                                save_state()
-                                ship['hp'] = min(ship['max_hp'], ship['hp'] + 1)
-                                st.rerun()
+                            if st.session_state.get('bulk_hp_mode', False):
+                                st.caption("📝 Edit in the Damage Control bulk table.")
+                            else:
+                                es1, es2, es3, es4 = st.columns(4)
+                                if es1.button("-1", key=f"e_dmg_{ship['id']}"):
+                                    save_state()
+                                    game_engine.adjust_ship_hp(ship, -1)
+                                    record_event("hp", actor=ship['type'], roll=-1, target=f"{e_name} · {ship['name']}")
+                                    st.rerun()
+                                if es2.button("+1", key=f"e_rep_{ship['id']}"):
+                                    save_state()
+                                    game_engine.adjust_ship_hp(ship, 1)
+                                    record_event("hp", actor=ship['type'], roll=1, target=f"{e_name} · {ship['name']}")
+                                    st.rerun()
                             
-                            if es3.button("💎☠️", key=f"e_kill_{ship['id']}", help="You sank it! (+1 Gem)"):
-                                save_state()
-                                enemy_data['ships'] = [s for s in enemy_data['ships'] if s['id'] != ship['id']]
-                                st.session_state.gems += 1
-                                st.toast(f"Destroyed {ship['name']}! +1 Gem")
-                                log(f"Sunk enemy {ship['name']}. +1 Gem awarded.")
-                                st.rerun()
+                                if es3.button("💎☠️", key=f"e_kill_{ship['id']}", help="You sank it! (+1 Gem)"):
+                                    save_state()
+                                    game_engine.remove_enemy_ship(st.session_state, e_name, ship['id'], reward=True)
+                                    st.toast(f"Destroyed {ship['name']}! +1 Gem")
+                                    record_event("enemy_sunk", actor=ship['type'], roll=1, target=f"{e_name} · {ship['name']}")
+                                    st.rerun()
                                 
-                            if es4.button("🗑️", key=f"e_rem_{ship['id']}", help="Sunk by another player (No reward)"):
-                                save_state()
-                                enemy_data['ships'] = [s for s in enemy_data['ships'] if s['id'] != ship['id']]
-                                st.toast(f"Removed {ship['name']}")
-                                log(f"Enemy {ship['name']} was sunk by another player.")
-                                st.rerun()
+                                if es4.button("🗑️", key=f"e_rem_{ship['id']}", help="Sunk by another player (No reward)"):
+                                    save_state()
+                                    game_engine.remove_enemy_ship(st.session_state, e_name, ship['id'], reward=False)
+                                    st.toast(f"Removed {ship['name']}")
+                                    record_event("enemy_sunk", actor=ship['type'], roll=0, target=f"{e_name} · {ship['name']}")
+                                    st.rerun()
+
+            if enemy_data['base_hp'] > 0:
+                with st.expander("🔮 Hidden Fleet Estimate"):
+                    est = enemy_estimate(e_name)
+                    st.caption(
+                        f"Simulated from {enemy_inference.DEFAULT_PARTICLES} possible histories since turn 1, "
+                        f"weighted by what you have spotted and sunk (effective sample: {est['ess']:.0f})."
+                    )
+                    hf1, hf2, hf3 = st.columns(3)
+                    hf1.metric("Likely Hidden Ships", f"{est['hidden_total']:.1f}")
+                    hf2.metric("Gold (10-90%)", f"{est['gold'][0.1]}–{est['gold'][0.9]}")
+                    hf3.metric("Steel (10-90%)", f"{est['steel'][0.1]}–{est['steel'][0.9]}")
+                    st.dataframe(pd.DataFrame([
+                        {"Unit": u, "Spotted": v['seen'], "Hidden (avg)": round(v['hidden_mean'], 2),
+                         "P(any hidden)": f"{v['p_hidden']:.0%}", "In Shipyard (avg)": round(v['queued_mean'], 2)}
+                        for u, v in est['units'].items()
+                    ]), hide_index=True)
+                    st.caption("Buildings (avg): " + ", ".join(f"{b} {n:.1f}" for b, n in est['buildings'].items()))
 
 
 # --- TAB 5: SHOP ---
@@ -642,9 +867,8 @@ with tab_shop:
             st.write("**Receive:** 30 Gold")
             if st.button("Trade for Gold", use_container_width=True, disabled=st.session_state.gems < 1):
                 save_state()
-                st.session_state.gems -= 1
-                st.session_state.gold += 30
-                log("Traded 1 Gem for 30 Gold.")
+                game_engine.trade_gem(st.session_state, "Gold")
+                record_event("trade", weapon="Gold", roll=30)
                 st.rerun()
                 
     with s2:
@@ -654,9 +878,8 @@ with tab_shop:
             st.write("**Receive:** 3 Steel")
             if st.button("Trade for Steel", use_container_width=True, disabled=st.session_state.gems < 1):
                 save_state()
-                st.session_state.gems -= 1
-                st.session_state.steel += 3
-                log("Traded 1 Gem for 3 Steel.")
+                game_engine.trade_gem(st.session_state, "Steel")
+                record_event("trade", weapon="Steel", roll=3)
                 st.rerun()
 
 
@@ -685,10 +908,8 @@ with tab_infra:
                 not_maxed = curr < limit
                 if st.button(f"Buy", key=f"buy_{b_name}", disabled=not (can_afford_g and can_afford_s and not_maxed)):
                     save_state()
-                    st.session_state.gold -= b_data['gold']
-                    st.session_state.steel -= b_data['steel']
-                    st.session_state.buildings[b_name] += 1
-                    log(f"Constructed {b_name}")
+                    game_engine.buy_building(st.session_state, b_name)
+                    record_event("building", actor=b_name)
                     st.rerun()
     
     st.divider()
@@ -699,8 +920,158 @@ with tab_infra:
     c3.metric("Base Defenses", st.session_state.buildings["Base Defense"])
     c4.metric("Shipyard", "Operational" if st.session_state.buildings["Shipyard"] else "None")
 
+    st.divider()
+    st.markdown("### 📈 Economy Forecast")
+    st.caption("Compare candidate build plans (all purchases made this turn) before committing gold.")
+
+    # Tabs all render on every rerun, so the editor and charts are only built on request.
+    if st.toggle("Show forecast", key="forecast_open"):
+        if 'forecast_plans' not in st.session_state:
+            st.session_state.forecast_plans = pd.DataFrame(FORECAST_DEFAULT_PLANS, columns=["Plan"] + FORECAST_ITEMS).fillna(0)
+
+        fc1, fc2 = st.columns([3, 1])
+        with fc1:
+            plan_df = st.data_editor(
+                st.session_state.forecast_plans,
+                num_rows="dynamic",
+                hide_index=True,
+                use_container_width=True,
+                column_config={item: st.column_config.NumberColumn(item, min_value=0, max_value=10, step=1, default=0) for item in FORECAST_ITEMS},
+                key="forecast_editor",
+            )
+        with fc2:
+            horizon = st.slider("Turns Ahead", min_value=1, max_value=30, value=10)
+            mine_gems = st.checkbox(
+                "Destroyers mine every turn (best case)", value=False,
+                help="Upper bound: assumes every Destroyer that fits in an Active slot not held by another ship type mines each turn.",
+            )
+
+        plan_df = plan_df.dropna(subset=["Plan"])
+        plan_df = plan_df[plan_df["Plan"].astype(str).str.strip() != ""]
+        if plan_df.empty:
+            st.info("Add at least one plan to forecast.")
+        else:
+            plan_names = plan_df["Plan"].astype(str).tolist()
+            plan_counts = tuple(tuple(int(v) for v in row) for row in plan_df[FORECAST_ITEMS].fillna(0).to_numpy())
+            fleet_counts = {}
+            for ship in st.session_state.fleet_list:
+                fleet_counts[ship['type']] = fleet_counts.get(ship['type'], 0) + 1
+            active_others = len([s for s in st.session_state.fleet_list if s['status'] == "Active" and s['type'] != "Destroyer"])
+
+            fc = forecast_economy(
+                plan_counts, horizon,
+                st.session_state.gold, st.session_state.steel, st.session_state.gems,
+                dict(st.session_state.buildings), fleet_counts,
+                tuple((q['type'], q['turns_left']) for q in st.session_state.queue),
+                mine_gems, max(0, FLEET_CAP_ACTIVE - active_others),
+            )
+
+            # Duplicate plan names would collapse chart columns, so suffix them.
+            labels = [name if plan_names.count(name) == 1 else f"{name} ({i + 1})" for i, name in enumerate(plan_names)]
+            turns_idx = pd.Index(st.session_state.turn + np.arange(horizon + 1), name="Turn")
+
+            for i, label in enumerate(labels):
+                if not fc["affordable"][i]:
+                    st.warning(f"{label}: cannot be afforded this turn.")
+                if not fc["within_limits"][i]:
+                    st.warning(f"{label}: exceeds a building, unit or fleet cap.")
+
+            g1, g2, g3 = st.columns(3)
+            with g1:
+                st.markdown("**Gold**")
+                st.line_chart(pd.DataFrame(fc["gold"].T, index=turns_idx, columns=labels))
+            with g2:
+                st.markdown("**Steel**")
+                st.line_chart(pd.DataFrame(fc["steel"].T, index=turns_idx, columns=labels))
+            with g3:
+                st.markdown("**Gems**")
+                st.line_chart(pd.DataFrame(fc["gems"].T, index=turns_idx, columns=labels))
+
+            st.markdown(f"**Fleet Composition on Turn {st.session_state.turn + horizon}**")
+            fleet_df = pd.DataFrame(fc["fleet"][:, :, -1], index=labels, columns=list(UNITS.keys()))
+            fleet_df = fleet_df.loc[:, (fleet_df != 0).any(axis=0)]
+            if fleet_df.empty:
+                st.caption("No ships afloat or on order in any plan.")
+            else:
+                st.bar_chart(fleet_df)
+
+
+# --- TAB 7: STATS ---
+with tab_stats:
+    st.subheader("📊 Battle Analytics")
+    stats = st.session_state.stats
+    
+    sm1, sm2, sm3 = st.columns(3)
+    sm1.metric("Total Damage Rolled", sum(stats['damage_by_unit'].values()))
+    sm2.metric("Gems Mined", stats['gems_mined'])
+    sm3.metric("Gems From Kills", stats['gems_from_kills'])
+    
+    sc1, sc2 = st.columns(2)
+    with sc1:
+        st.markdown("#### Damage by Unit Type")
+        if stats['damage_by_unit']:
+            st.bar_chart(pd.DataFrame({"Damage": stats['damage_by_unit']}))
+            st.caption(" | ".join(
+                f"{u}: {stats['damage_by_unit'][u] / stats['shots_by_unit'][u]:.1f} avg over {stats['shots_by_unit'][u]} shots"
+                for u in stats['damage_by_unit']
+            ))
+        else:
+            st.caption("No attacks rolled yet.")
+    with sc2:
+        st.markdown("#### Gems: Mined vs Kill Rewards")
+        st.bar_chart(pd.DataFrame({"Gems": {"Mined": stats['gems_mined'], "Kills": stats['gems_from_kills']}}))
+    
+    st.markdown("#### Gold & Steel by Turn")
+    st.line_chart(pd.DataFrame(stats['curve']).set_index("Turn"))
+    
+    st.caption(
+        f"Events are exported to `{os.path.join(EXPORT_DIR, st.session_state.game_id)}` as Parquet parts "
+        f"({st.session_state.event_seq} recorded, {len(st.session_state.events)} pending flush)."
+    )
+
+
+# --- TAB 8: ARCHIVE ---
+with tab_archive:
+    st.subheader("🗄️ Game Archive")
+    conn = get_archive_conn()
+    total_games = game_archive.count_games(conn)
+    
+    if total_games == 0:
+        st.caption("No finished games yet. Use 🏁 Finish Game in the sidebar to archive one.")
+    else:
+        st.markdown("#### Across All Games")
+        q1, q2 = st.columns(2)
+        with q1:
+            q_unit = st.selectbox("Unit", list(UNITS.keys()), key="arch_unit")
+            avg_turn, n = game_archive.avg_first_commission_turn(conn, q_unit)
+            st.metric(f"Avg Turn of First {q_unit}", f"{avg_turn:.1f}" if avg_turn is not None else "—", help=f"Over {n} games")
+        with q2:
+            qb1, qb2 = st.columns(2)
+            q_build = qb1.selectbox("Building", list(BUILDINGS.keys()), key="arch_build")
+            q_count = qb2.number_input("At Least", min_value=1, max_value=BUILDINGS[q_build]['limit'], value=1, key="arch_count")
+            rate, n = game_archive.win_rate_with_building(conn, q_build, q_count)
+            st.metric(f"Win Rate with {q_count}+ {q_build}", f"{rate:.0%}" if rate is not None else "—", help=f"Over {n} games")
+        
+        st.divider()
+        
+        pages = (total_games - 1) // game_archive.ARCHIVE_PAGE_SIZE + 1
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="arch_page") - 1
+        games = game_archive.list_games(conn, page)
+        for g in games:
+            g['finished_at'] = datetime.datetime.fromtimestamp(g['finished_at']).strftime("%Y-%m-%d %H:%M")
+        games_df = pd.DataFrame(games)
+        st.dataframe(games_df.drop(columns=["game_id"]), hide_index=True, use_container_width=True)
+        
+        labels = {g['game_id']: f"{g['finished_at']} · {g['outcome']} · Turn {g['turns']}" for g in games}
+        picked = st.selectbox("Open Game", list(labels.keys()), format_func=labels.get, key="arch_pick")
+        snaps = game_archive.game_snapshots(conn, picked)
+        if snaps:
+            st.line_chart(pd.DataFrame(snaps).set_index("turn")[["gold", "steel", "gems", "base_hp"]])
+        with st.expander("Action Events"):
+            st.dataframe(pd.DataFrame(game_archive.game_events(conn, picked)), hide_index=True, use_container_width=True)
+
 
-# --- TAB 7: RULES ---
+# --- TAB 9: RULES ---
 with tab_rules:
     st.subheader("📜 Official Game Rules")
     
@@ -824,8 +1195,24 @@ with st.sidebar:
                 st.rerun()
         else:
             if st.button("Confirm Reset", type="primary"):
+                flush_events()
                 st.session_state.clear()
                 st.rerun()
             if st.button("Cancel"):
                 st.session_state.confirm_reset = False
-                st.rerun()
\ No newline at end of file
+                st.rerun()
+    
+    st.divider()
+    if not st.session_state.get('confirm_finish', False):
+        if st.button("🏁 Finish Game", use_container_width=True):
+            st.session_state.confirm_finish = True
+            st.rerun()
+    else:
+        outcome = st.radio("Outcome", ["Victory", "Defeat"], horizontal=True)
+        if st.button("Archive & Start New Game", type="primary", use_container_width=True):
+            archive_game(outcome)
+            st.session_state.clear()
+            st.rerun()
+        if st.button("Cancel", key="cancel_finish", use_container_width=True):
+            st.session_state.confirm_finish = False
+            st.rerun()
\ No newline at end of file
@@ -0,0 +1,109 @@
+import asyncio
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import time
+import headless_server
+
+# --- SCRIPTED TURN ---
+# A realistic turn for one bot: mine, trade, build up the economy, field ships, log
+# spotted enemies and hits, then end the turn. Actions that hit a cap simply fail; they
+# are reported separately and left out of the actions/s figures.
+SCRIPTED_TURN = [
+    {"op": "mine"},
+    {"op": "trade", "resource": "Gold"},
+    {"op": "build", "building": "Gold Mine"},
+    {"op": "commission", "unit": "Destroyer"},
+    {"op": "commission", "unit": "Cruiser"},
+    {"op": "spawn", "enemy": "Enemy 1", "unit": "Cruiser"},
+    {"op": "hp", "ship": "Destroyer 1", "delta": -1},
+    {"op": "hp", "ship": "Destroyer 1", "delta": 1},
+    {"op": "base_hp", "enemy": "Enemy 1", "delta": -2},
+    {"op": "end_turn"},
+]
+
+def scripted_actions(count):
+    return [SCRIPTED_TURN[i % len(SCRIPTED_TURN)] for i in range(count)]
+
+
+# --- IN-PROCESS ---
+def bench_in_process(games, turns):
+    registry = headless_server.GameRegistry()
+    ids = [registry.create() for _ in range(games)]
+    actions = scripted_actions(turns * len(SCRIPTED_TURN))
+    ok = 0
+    start = time.perf_counter()
+    for game_id in ids:
+        ok += sum(r['ok'] for r in registry.apply(game_id, actions))
+    elapsed = time.perf_counter() - start
+    return ok, games * len(actions) - ok, elapsed
+
+
+# --- HTTP ---
+async def http_request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return json.loads(await reader.readexactly(length))
+
+async def bot(host, port, turns, batch):
+    reader, writer = await asyncio.open_connection(host, port)
+    game_id = (await http_request(reader, writer, "POST", "/games"))['game_id']
+    actions = scripted_actions(turns * len(SCRIPTED_TURN))
+    requests, ok = 0, 0
+    for i in range(0, len(actions), batch):
+        response = await http_request(reader, writer, "POST", f"/games/{game_id}/actions", {"actions": actions[i:i + batch]})
+        ok += sum(r['ok'] for r in response['results'])
+        requests += 1
+    writer.close()
+    return ok, len(actions) - ok, requests
+
+async def bench_http(host, port, games, turns, batch):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bot(host, port, turns, batch) for _ in range(games)))
+    elapsed = time.perf_counter() - start
+    return sum(r[0] for r in results), sum(r[1] for r in results), sum(r[2] for r in results), elapsed
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((headless_server.DEFAULT_HOST, 0))
+        return s.getsockname()[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the headless Battleship API.")
+    parser.add_argument("--games", type=int, default=50, help="Concurrent games (one client connection each).")
+    parser.add_argument("--turns", type=int, default=40, help="Scripted turns per game.")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 100], help="Actions per HTTP request.")
+    args = parser.parse_args()
+
+    ok, failed, elapsed = bench_in_process(args.games, args.turns)
+    print(f"in-process      : {ok:>8} ok + {failed} rejected in {elapsed:6.2f}s -> {ok / elapsed:>10,.0f} ok actions/s")
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, headless_server.__file__, "--port", str(port)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        server.stdout.readline()
+        for batch in args.batch:
+            ok, failed, reqs, elapsed = asyncio.run(bench_http(headless_server.DEFAULT_HOST, port, args.games, args.turns, batch))
+            print(
+                f"http batch={batch:<4}: {ok:>8} ok + {failed} rejected in {elapsed:6.2f}s -> {ok / elapsed:>10,.0f} ok actions/s "
+                f"({reqs / elapsed:,.0f} req/s, {args.games} concurrent games)"
+            )
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,72 @@
+import argparse
+import itertools
+import random
+import sys
+import numpy as np
+import target_solver
+
+# --- BRUTE FORCE ---
+# Tries every firing option and every shooter -> target (or hold fire) assignment, so it
+# shares only the per-hit damage table with the solver.
+SHOOTER_UNITS = ["Aircraft Carrier", "Battleship", "Cruiser", "Destroyer", "Torpedo Boat", "Submarine"]
+TARGET_TYPES = SHOOTER_UNITS + ["Decoy", "Base"]
+
+def kill_probability(target, kinds):
+    hp = target['hp']
+    pmf = np.zeros(hp + 1)
+    pmf[0] = 1.0
+    for kind in kinds:
+        conv = np.convolve(pmf, target_solver.hit_pmf(kind, target['type'], hp))
+        pmf = np.concatenate([conv[:hp], [conv[hp:].sum()]])
+    return pmf[hp]
+
+def brute_force(shooters, targets, objective):
+    best = 0.0
+    for attacks in target_solver.firing_options(shooters):
+        for assign in itertools.product(range(len(targets) + 1), repeat=len(attacks)):
+            total, legal = 0.0, True
+            for t_idx, target in enumerate(targets):
+                kinds = [kind for (_, kind), a in zip(attacks, assign) if a == t_idx]
+                if target['type'] == "Base" and any(k in target_solver.NO_BASE_ATTACKS for k in kinds):
+                    legal = False
+                    break
+                if kinds:
+                    total += kill_probability(target, kinds) * (1 if objective == "kills" else target['gems'])
+            if legal:
+                best = max(best, total)
+    return best
+
+def random_case(rng, max_attacks):
+    while True:
+        shooters = [{"name": f"Ship {i + 1}", "unit": rng.choice(SHOOTER_UNITS)} for i in range(rng.randint(1, 4))]
+        shooters += [{"name": f"Bomber {i + 1}", "unit": "Base Defense"} for i in range(rng.choice([0, 0, 1, 2]))]
+        attacks = len(shooters) + sum(s['unit'] == "Aircraft Carrier" for s in shooters)
+        if attacks <= max_attacks:
+            break
+    targets = []
+    for i in range(rng.randint(1, 3)):
+        t_type = rng.choice(TARGET_TYPES)
+        targets.append({"label": f"Target {i + 1}", "type": t_type, "hp": rng.randint(1, 13), "gems": 0 if t_type == "Base" else 1})
+    return shooters, targets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the target solver against brute-force enumeration.")
+    parser.add_argument("--cases", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-attacks", type=int, default=6, help="Cap on attacks per case; brute force is (targets + 1) ** attacks.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    for case in range(args.cases):
+        shooters, targets = random_case(rng, args.max_attacks)
+        for objective in target_solver.OBJECTIVES:
+            plan = target_solver.solve(shooters, targets, objective)
+            got = plan['expected_kills'] if objective == "kills" else plan['expected_gems']
+            want = brute_force(shooters, targets, objective)
+            if abs(got - want) > 1e-3:
+                failures += 1
+                print(f"case {case} ({objective}): solver {got:.4f} vs brute force {want:.4f}\n  {shooters}\n  {targets}")
+    print(f"{args.cases * len(target_solver.OBJECTIVES) - failures}/{args.cases * len(target_solver.OBJECTIVES)} solves match brute force.")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,178 @@
+import numpy as np
+from game_engine import (
+    STARTING_GOLD, STARTING_STEEL, BASE_GOLD_INCOME, BASE_STEEL_INCOME,
+    FLEET_CAP_ACTIVE, FLEET_CAP_RESERVE, UNITS, BUILDINGS,
+)
+
+# --- INFERENCE SETTINGS ---
+DEFAULT_PARTICLES = 1000
+MAX_BUYS_PER_TURN = 3
+# Soft penalty per unit of disagreement with what we have seen, so a surprise sighting
+# shifts belief instead of wiping out every particle.
+MISMATCH_PENALTY = 4.0
+
+# Prior over what an opponent does with each purchase decision ("Save" ends shopping).
+PURCHASE_PRIOR = {
+    "Save": 3.0,
+    "Gold Mine": 2.0, "Steel Factory": 1.0, "Base Defense": 0.5, "Shipyard": 0.3,
+    "Aircraft Carrier": 0.8, "Battleship": 1.0, "Cruiser": 1.5, "Destroyer": 1.5,
+    "Torpedo Boat": 1.0, "Submarine": 1.0, "Decoy": 0.3,
+}
+
+UNIT_NAMES = list(UNITS.keys())
+BUILDING_NAMES = list(BUILDINGS.keys())
+ITEM_NAMES = ["Save"] + BUILDING_NAMES + UNIT_NAMES
+N_B, N_U = len(BUILDING_NAMES), len(UNIT_NAMES)
+ITEM_GOLD = np.array([0] + [BUILDINGS[b]['gold'] for b in BUILDING_NAMES] + [UNITS[u]['gold'] for u in UNIT_NAMES])
+ITEM_STEEL = np.array([0] + [BUILDINGS[b]['steel'] for b in BUILDING_NAMES] + [UNITS[u]['steel'] for u in UNIT_NAMES])
+ITEM_PROBS = np.array([PURCHASE_PRIOR[i] for i in ITEM_NAMES], dtype=float)
+ITEM_PROBS /= ITEM_PROBS.sum()
+BUILDING_LIMITS = np.array([BUILDINGS[b]['limit'] for b in BUILDING_NAMES])
+UNIT_GOLD = ITEM_GOLD[1 + N_B:]
+UNIT_STEEL = ITEM_STEEL[1 + N_B:]
+UNIT_LIMITS = np.array([UNITS[u]['limit'] for u in UNIT_NAMES])
+UNIT_TURNS = np.array([UNITS[u]['turns'] for u in UNIT_NAMES])
+MAX_BUILD_TURNS = int(UNIT_TURNS.max())
+SHIP_CAP = FLEET_CAP_ACTIVE + FLEET_CAP_RESERVE
+
+
+# --- PARTICLE FILTER ---
+class EnemyFleetFilter:
+    # Each particle is one possible history of an opponent who started with the standard
+    # resources and a Destroyer. All particles are advanced and weighted together as arrays.
+    def __init__(self, n=DEFAULT_PARTICLES, seed=None):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.turn = 1
+        self.sunk_seen = 0
+        # Filters live in session state, so arrays use the smallest dtypes that fit: banks stay
+        # well inside int32 and every count is capped in single digits.
+        self.gold = np.full(n, STARTING_GOLD, dtype=np.int32)
+        self.steel = np.full(n, STARTING_STEEL, dtype=np.int32)
+        self.buildings = np.zeros((n, N_B), dtype=np.int16)
+        self.alive = np.zeros((n, N_U), dtype=np.int16)
+        self.alive[:, UNIT_NAMES.index("Destroyer")] = 1
+        # pending[:, u, k] = builds of unit u that finish after k more End Turns.
+        self.pending = np.zeros((n, N_U, MAX_BUILD_TURNS + 1), dtype=np.int16)
+        self.weights = np.full(n, 1.0 / n)
+
+    def _shop(self):
+        rows = np.arange(self.n)
+        shopping = np.ones(self.n, dtype=bool)
+        for _ in range(MAX_BUYS_PER_TURN):
+            choice = self.rng.choice(len(ITEM_NAMES), size=self.n, p=ITEM_PROBS)
+            shopping &= choice > 0
+            valid = shopping & (self.gold >= ITEM_GOLD[choice]) & (self.steel >= ITEM_STEEL[choice])
+
+            is_b = (choice >= 1) & (choice <= N_B)
+            b_idx = np.clip(choice - 1, 0, N_B - 1)
+            valid &= ~is_b | (self.buildings[rows, b_idx] < BUILDING_LIMITS[b_idx])
+
+            is_u = choice > N_B
+            u_idx = np.clip(choice - 1 - N_B, 0, N_U - 1)
+            owned = self.alive + self.pending.sum(axis=2)
+            valid &= ~is_u | ((owned[rows, u_idx] < UNIT_LIMITS[u_idx]) & (owned.sum(axis=1) < SHIP_CAP))
+
+            self.gold -= np.where(valid, ITEM_GOLD[choice], 0)
+            self.steel -= np.where(valid, ITEM_STEEL[choice], 0)
+            self.buildings[rows, b_idx] += valid & is_b
+            self.pending[rows, u_idx, UNIT_TURNS[u_idx]] += valid & is_u
+
+    def _end_turn(self):
+        self.gold += BASE_GOLD_INCOME + self.buildings[:, BUILDING_NAMES.index("Gold Mine")] * 10
+        self.steel += BASE_STEEL_INCOME + self.buildings[:, BUILDING_NAMES.index("Steel Factory")] * 1
+        # Zero-turn builds (index 0) deployed when bought; index 1 completes on this End Turn.
+        self.alive += self.pending[:, :, 1]
+        self.pending[:, :, 1:-1] = self.pending[:, :, 2:]
+        self.pending[:, :, -1] = 0
+
+    def advance_to(self, turn):
+        while self.turn < turn:
+            self._shop()
+            self.alive += self.pending[:, :, 0]
+            self.pending[:, :, 0] = 0
+            self._end_turn()
+            self.turn += 1
+
+    def observe(self, observed, sunk):
+        # observed: per-type counts of ships we are tracking now; sunk: every loss by type so far.
+        for u_type in sunk[self.sunk_seen:]:
+            u = UNIT_NAMES.index(u_type)
+            has = self.alive[:, u] > 0
+            self.alive[:, u] -= has
+            # A particle that never had this ship cannot explain its sinking.
+            self.weights *= np.where(has, 1.0, np.exp(-MISMATCH_PENALTY))
+        self.sunk_seen = len(sunk)
+
+        seen = np.array([observed.get(u, 0) for u in UNIT_NAMES])
+        shortfall = np.clip(seen[None, :] - self.alive, 0, None).sum(axis=1)
+        self.weights *= np.exp(-MISMATCH_PENALTY * shortfall)
+        total = self.weights.sum()
+        if total <= 0 or not np.isfinite(total):
+            self.weights = np.full(self.n, 1.0 / self.n)
+        else:
+            self.weights /= total
+
+        self._lift(seen)
+        if self.ess() < self.n / 2:
+            self._resample()
+
+    def _lift(self, seen):
+        # Ships we have spotted must exist. A particle still short of them first finishes
+        # matching builds from its shipyard, then pays for the rest; particles that could
+        # not have afforded them or would break a cap are all but ruled out.
+        deficit = np.clip(seen[None, :] - self.alive, 0, None)
+        remaining = deficit.copy()
+        for k in range(1, MAX_BUILD_TURNS + 1):
+            take = np.minimum(remaining, self.pending[:, :, k])
+            self.pending[:, :, k] -= take
+            remaining -= take
+        cost_gold, cost_steel = remaining @ UNIT_GOLD, remaining @ UNIT_STEEL
+        self.alive += deficit
+
+        owned = self.alive + self.pending.sum(axis=2)
+        infeasible = (self.gold < cost_gold) | (self.steel < cost_steel) \
+            | (owned > UNIT_LIMITS[None, :]).any(axis=1) | (owned.sum(axis=1) > SHIP_CAP)
+        self.gold -= np.minimum(self.gold, cost_gold).astype(self.gold.dtype)
+        self.steel -= np.minimum(self.steel, cost_steel).astype(self.steel.dtype)
+        if infeasible.any():
+            self.weights *= np.where(infeasible, np.exp(-3 * MISMATCH_PENALTY), 1.0)
+            self.weights /= self.weights.sum()
+
+    def ess(self):
+        return 1.0 / np.sum(self.weights ** 2)
+
+    def _resample(self):
+        positions = (self.rng.random() + np.arange(self.n)) / self.n
+        idx = np.minimum(np.searchsorted(np.cumsum(self.weights), positions), self.n - 1)
+        for name in ("gold", "steel", "buildings", "alive", "pending"):
+            setattr(self, name, getattr(self, name)[idx].copy())
+        self.weights = np.full(self.n, 1.0 / self.n)
+
+    def summary(self, observed):
+        seen = np.array([observed.get(u, 0) for u in UNIT_NAMES])
+        hidden = np.clip(self.alive - seen[None, :], 0, None)
+        queued = self.pending.sum(axis=2)
+        w = self.weights
+        return {
+            "units": {
+                u: {
+                    "seen": int(seen[i]),
+                    "hidden_mean": float(w @ hidden[:, i]),
+                    "p_hidden": float(w @ (hidden[:, i] > 0)),
+                    "queued_mean": float(w @ queued[:, i]),
+                }
+                for i, u in enumerate(UNIT_NAMES)
+            },
+            "buildings": {b: float(w @ self.buildings[:, i]) for i, b in enumerate(BUILDING_NAMES)},
+            "gold": weighted_quantiles(self.gold, w),
+            "steel": weighted_quantiles(self.steel, w),
+            "hidden_total": float(w @ hidden.sum(axis=1)),
+            "ess": float(self.ess()),
+        }
+
+
+def weighted_quantiles(values, weights, qs=(0.1, 0.5, 0.9)):
+    order = np.argsort(values)
+    cdf = np.cumsum(weights[order])
+    return {q: int(values[order][min(np.searchsorted(cdf, q), len(values) - 1)]) for q in qs}
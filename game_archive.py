@@ -0,0 +1,192 @@
+import sqlite3
+import threading
+import queue
+import json
+import time
+
+# --- ARCHIVE SETTINGS ---
+ARCHIVE_PATH = "game_archive.db"
+ARCHIVE_PAGE_SIZE = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id     TEXT PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    turns       INTEGER NOT NULL,
+    outcome     TEXT NOT NULL,
+    gold        INTEGER,
+    steel       INTEGER,
+    gems        INTEGER,
+    base_hp     INTEGER,
+    final_state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_id TEXT NOT NULL REFERENCES games(game_id),
+    turn    INTEGER NOT NULL,
+    gold    INTEGER,
+    steel   INTEGER,
+    gems    INTEGER,
+    base_hp INTEGER,
+    state   TEXT NOT NULL,
+    PRIMARY KEY (game_id, turn)
+);
+CREATE TABLE IF NOT EXISTS events (
+    game_id TEXT NOT NULL REFERENCES games(game_id),
+    seq     INTEGER NOT NULL,
+    turn    INTEGER NOT NULL,
+    kind    TEXT NOT NULL,
+    actor   TEXT,
+    weapon  TEXT,
+    roll    INTEGER,
+    target  TEXT,
+    gold    INTEGER,
+    steel   INTEGER,
+    gems    INTEGER,
+    undo_to INTEGER,
+    PRIMARY KEY (game_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_games_outcome ON games(outcome);
+CREATE INDEX IF NOT EXISTS idx_games_finished ON games(finished_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_turn ON snapshots(turn);
+CREATE INDEX IF NOT EXISTS idx_events_turn ON events(turn);
+CREATE INDEX IF NOT EXISTS idx_events_unit ON events(actor, kind, turn);
+"""
+
+EVENT_COLUMNS = ("seq", "turn", "kind", "actor", "weapon", "roll", "target", "gold", "steel", "gems", "undo_to")
+# Events that are never part of an undoable action: dice rolls and the undos themselves.
+UNDO_EXEMPT_KINDS = {"attack", "undo"}
+
+
+def connect(path=ARCHIVE_PATH):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    # Archives created before undo_to existed get the column added in place.
+    if "undo_to" not in [row[1] for row in conn.execute("PRAGMA table_info(events)")]:
+        conn.execute("ALTER TABLE events ADD COLUMN undo_to INTEGER")
+    return conn
+
+
+# --- BACKGROUND WRITER ---
+class ArchiveWriter:
+    # Games are queued from the UI thread and written in bulk by one worker thread,
+    # so finishing a game never blocks a rerun on disk I/O.
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = path
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, game):
+        self.pending.put(game)
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+
+    def flush(self):
+        self.pending.join()
+
+    def _run(self):
+        conn = connect(self.path)
+        running = True
+        while running:
+            batch = [self.pending.get()]
+            # Drain whatever else is waiting so several games share one transaction.
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            games = [g for g in batch if g is not None]
+            running = len(games) == len(batch)
+            try:
+                if games:
+                    write_games(conn, games)
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+        conn.close()
+
+
+def drop_undone(events):
+    # An "undo" event voids the undoable events after seq == its undo_to, up to the undo itself.
+    voided = [(ev['undo_to'], ev['seq']) for ev in events if ev['kind'] == "undo"]
+    return [
+        ev for ev in events
+        if ev['kind'] in UNDO_EXEMPT_KINDS or not any(lo < ev['seq'] < hi for lo, hi in voided)
+    ]
+
+
+def write_games(conn, games):
+    game_rows, snapshot_rows, event_rows = [], [], []
+    for g in games:
+        final = g['final_state']
+        game_rows.append((
+            g['game_id'], g.get('finished_at', time.time()), final['turn'], g['outcome'],
+            final['gold'], final['steel'], final['gems'], final['base_hp'], json.dumps(final),
+        ))
+        for snap in g['snapshots']:
+            snapshot_rows.append((
+                g['game_id'], snap['turn'], snap['gold'], snap['steel'], snap['gems'], snap['base_hp'], json.dumps(snap),
+            ))
+        for ev in g['events']:
+            event_rows.append((g['game_id'],) + tuple(ev.get(c) for c in EVENT_COLUMNS))
+
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", game_rows)
+        conn.executemany("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", snapshot_rows)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO events (game_id, {', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * (len(EVENT_COLUMNS) + 1))})",
+            event_rows,
+        )
+
+
+# --- QUERIES ---
+def count_games(conn):
+    return conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+
+def list_games(conn, page=0, page_size=ARCHIVE_PAGE_SIZE):
+    # Summary columns only; final_state and history stay on disk until a game is opened.
+    rows = conn.execute(
+        "SELECT game_id, finished_at, turns, outcome, gold, steel, gems, base_hp FROM games "
+        "ORDER BY finished_at DESC LIMIT ? OFFSET ?",
+        (page_size, page * page_size),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def game_snapshots(conn, game_id):
+    rows = conn.execute(
+        "SELECT turn, gold, steel, gems, base_hp FROM snapshots WHERE game_id = ? ORDER BY turn", (game_id,)
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def game_events(conn, game_id):
+    rows = conn.execute(
+        f"SELECT {', '.join(EVENT_COLUMNS)} FROM events WHERE game_id = ? ORDER BY seq", (game_id,)
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def avg_first_commission_turn(conn, u_type):
+    row = conn.execute(
+        "SELECT AVG(first_turn), COUNT(*) FROM ("
+        "  SELECT MIN(turn) AS first_turn FROM events"
+        "  WHERE actor = ? AND kind = 'commission' GROUP BY game_id"
+        ")",
+        (u_type,),
+    ).fetchone()
+    return row[0], row[1]
+
+
+def win_rate_with_building(conn, b_name, count):
+    row = conn.execute(
+        "SELECT AVG(outcome = 'Victory'), COUNT(*) FROM games "
+        "WHERE json_extract(final_state, '$.buildings.\"' || ? || '\"') >= ?",
+        (b_name, count),
+    ).fetchone()
+    return row[0], row[1]
@@ -0,0 +1,348 @@
+import uuid
+import types
+
+# --- RULES & CONSTANTS ---
+STARTING_GOLD = 150
+STARTING_STEEL = 10
+STARTING_GEMS = 0
+BASE_GOLD_INCOME = 20
+BASE_STEEL_INCOME = 2
+FLEET_CAP_ACTIVE = 7
+FLEET_CAP_RESERVE = 3
+BASE_MAX_HP = 30
+ENEMY_NAMES = ["Enemy 1", "Enemy 2", "Enemy 3"]
+
+# Unit Stats
+UNITS = {
+    "Aircraft Carrier": {
+        "gold": 100, "steel": 10, "turns": 3, "hp": 7, "limit": 2,
+        "desc": "Range 4, 1x(3-10) or 2x(1-5)",
+        "bonus": "Cannot Move and Attack on the same turn"
+    },
+    "Battleship": {
+        "gold": 90,  "steel": 9, "turns": 2, "hp": 13, "limit": 3,
+        "desc": "Range 3, Dmg 2-7",
+        "bonus": "Damage Reduction: Torpedoes (3) and Aircraft (1)"
+    },
+    "Cruiser": {
+        "gold": 50,  "steel": 5, "turns": 1, "hp": 9,  "limit": 4,
+        "desc": "Range 2, Dmg 2-4",
+        "bonus": "Damage Reduction: Submarines (5)"
+    },
+    "Destroyer": {
+        "gold": 30,  "steel": 3, "turns": 0, "hp": 5,  "limit": 5,
+        "desc": "Range 2, Dmg 1-3, Mine Gems",
+        "bonus": "Damage Reduction: Aircraft (2). Deals 2x Dmg vs Subs & Torpedo Boats."
+    },
+    "Torpedo Boat": {
+        "gold": 40,  "steel": 2, "turns": 0, "hp": 3,  "limit": 2, # Updated limit to 2
+        "desc": "Range 1, Torpedo (2-7 dmg)",
+        "bonus": "Vulnerable to Destroyers (Takes 2x Dmg from them)."
+    },
+    "Submarine": {
+        "gold": 40,  "steel": 2, "turns": 0, "hp": 3,  "limit": 2,
+        "desc": "Torpedo (7 dmg), Hidden",
+        "bonus": "Immune to Battleships. Cannot attack bases. Invisible until 1 tile away."
+    },
+    "Decoy": {
+        "gold": 20,  "steel": 0, "turns": 0, "hp": 1,  "limit": 1,
+        "desc": "Fake ship placement.",
+        "bonus": "Destroyed immediately upon reveal."
+    },
+}
+
+BUILDINGS = {
+    "Gold Mine": {
+        "gold": 20, "steel": 2, "limit": 4,
+        "effect": "+10 Gold/turn",
+        "desc": "Deep earth mining infrastructure to fund the war effort."
+    },
+    "Steel Factory": {
+        "gold": 30, "steel": 1, "limit": 3,
+        "effect": "+1 Steel/turn",
+        "desc": "Heavy industrial processing for ship armor and hulls."
+    },
+    "Base Defense": {
+        "gold": 30, "steel": 0, "limit": 2,
+        "effect": "+1 Bomber (2-4 Dmg)",
+        "desc": "Scramble interceptors to defend the homeland."
+    },
+    "Shipyard": {
+        "gold": 50, "steel": 3, "limit": 1,
+        "effect": "Unlocks Repairs",
+        "desc": "Allows repairing ships (3HP) within 1 tile of base."
+    }
+}
+
+# Black market: 1 Gem buys this much of a resource.
+GEM_TRADES = {"Gold": ("gold", 30), "Steel": ("steel", 3)}
+
+
+# --- STATE ---
+# Every function here takes a `state` with attribute access: st.session_state in the
+# app, or the namespace returned by new_game() for headless play.
+def new_game():
+    state = types.SimpleNamespace(
+        gold=STARTING_GOLD,
+        steel=STARTING_STEEL,
+        gems=STARTING_GEMS,
+        turn=1,
+        base_hp=BASE_MAX_HP,
+        queue=[],
+        buildings={"Gold Mine": 0, "Steel Factory": 0, "Shipyard": 0, "Base Defense": 0},
+        logs=["Game Started. Good luck, Commander."],
+        fleet_list=[],
+        enemies={e_name: {"base_hp": BASE_MAX_HP, "ships": [], "sunk": []} for e_name in ENEMY_NAMES},
+    )
+    state.fleet_list.append(create_player_ship(state, "Destroyer", "Active"))
+    return state
+
+def log(state, msg):
+    state.logs.insert(0, f"Turn {state.turn}: {msg}")
+
+# --- DYNAMIC NUMBERING HELPER ---
+def get_next_ship_number(fleet_list, u_type, limit):
+    used = [s['num'] for s in fleet_list if s['type'] == u_type]
+    for i in range(1, limit + 1):
+        if i not in used:
+            return i
+    return limit + 1
+
+def create_player_ship(state, u_type, status="Active"):
+    num = get_next_ship_number(state.fleet_list, u_type, UNITS[u_type]["limit"])
+    name_display = f"{u_type} {num}" if u_type != "Decoy" else u_type
+
+    return {
+        "id": str(uuid.uuid4()),
+        "type": u_type,
+        "num": num,
+        "name": name_display,
+        "status": status,
+        "hp": UNITS[u_type]["hp"],
+        "max_hp": UNITS[u_type]["hp"],
+        "mined_this_turn": False
+    }
+
+def find_ship(state, ship_id, enemy=None):
+    ships = state.fleet_list if enemy is None else state.enemies[enemy]['ships']
+    ship = next((s for s in ships if s['id'] == ship_id), None)
+    if ship is None:
+        raise ValueError(f"Unknown ship: {ship_id}")
+    return ship
+
+
+# --- TURN ---
+def end_turn(state):
+    gold_gain = BASE_GOLD_INCOME + (state.buildings["Gold Mine"] * 10)
+    steel_gain = BASE_STEEL_INCOME + (state.buildings["Steel Factory"] * 1)
+
+    state.gold += gold_gain
+    state.steel += steel_gain
+
+    completed = []
+    new_queue = []
+    for item in state.queue:
+        item['turns_left'] -= 1
+        if item['turns_left'] <= 0:
+            completed.append(item['type'])
+            active_count = sum(1 for s in state.fleet_list if s['status'] == "Active")
+            status = "Active" if active_count < FLEET_CAP_ACTIVE else "Reserve"
+            state.fleet_list.append(create_player_ship(state, item['type'], status))
+        else:
+            new_queue.append(item)
+
+    state.queue = new_queue
+
+    for ship in state.fleet_list:
+        if ship['type'] == 'Destroyer':
+            ship['mined_this_turn'] = False
+
+    log(state, f"Collected +{gold_gain} Gold, +{steel_gain} Steel.")
+    if completed:
+        log(state, f"✅ Deployment Complete: {', '.join(completed)}")
+
+    state.turn += 1
+    return gold_gain, steel_gain, completed
+
+
+# --- SHIPYARD ---
+def commission_error(state, u_type, rush_turns=0):
+    if u_type not in UNITS:
+        return f"Unknown unit: {u_type}"
+    s = UNITS[u_type]
+    total_u = len([ship for ship in state.fleet_list if ship['type'] == u_type]) \
+        + len([q for q in state.queue if q['type'] == u_type])
+    if total_u >= s['limit']:
+        return f"{u_type} limit reached!"
+    if rush_turns < 0 or rush_turns > s['turns']:
+        return "Invalid rush turns!"
+    if state.gold < s['gold'] or state.steel < s['steel'] or state.gems < rush_turns * 2:
+        return "Insufficient Funds or Gems!"
+    return None
+
+def commission(state, u_type, rush_turns=0):
+    error = commission_error(state, u_type, rush_turns)
+    if error:
+        raise ValueError(error)
+    s = UNITS[u_type]
+    state.gold -= s['gold']
+    state.steel -= s['steel']
+    state.gems -= (rush_turns * 2)
+
+    final_turns = s['turns'] - rush_turns
+
+    if final_turns == 0:
+        state.fleet_list.append(create_player_ship(state, u_type, "Active"))
+        log(state, f"Rushed construction of {u_type} instantly!")
+    else:
+        state.queue.append({'type': u_type, 'turns_left': final_turns})
+        log(state, f"Started construction of {u_type} ({final_turns} turns remaining).")
+    return final_turns
+
+def delete_ship(state, ship_id):
+    ship = find_ship(state, ship_id)
+    state.fleet_list = [s for s in state.fleet_list if s['id'] != ship_id]
+    log(state, "Ship sunk/scrapped.")
+    return ship
+
+def toggle_ship_status(state, ship_id):
+    ship = find_ship(state, ship_id)
+    active_count = sum(1 for s in state.fleet_list if s['status'] == "Active")
+    reserve_count = sum(1 for s in state.fleet_list if s['status'] == "Reserve")
+
+    if ship['status'] == "Active":
+        if reserve_count >= FLEET_CAP_RESERVE:
+            raise ValueError("Reserve Fleet Full!")
+        ship['status'] = "Reserve"
+        log(state, f"⚓ {ship['name']} moved to Reserve.")
+    elif ship['status'] == "Reserve":
+        if active_count >= FLEET_CAP_ACTIVE:
+            raise ValueError("Active Fleet Full!")
+        ship['status'] = "Active"
+        log(state, f"⚔️ {ship['name']} deployed to Active.")
+    return ship
+
+
+# --- ECONOMY ---
+def buy_building(state, b_name):
+    if b_name not in BUILDINGS:
+        raise ValueError(f"Unknown building: {b_name}")
+    b_data = BUILDINGS[b_name]
+    if state.buildings.get(b_name, 0) >= b_data['limit']:
+        raise ValueError(f"{b_name} limit reached!")
+    if state.gold < b_data['gold'] or state.steel < b_data['steel']:
+        raise ValueError("Insufficient Funds!")
+    state.gold -= b_data['gold']
+    state.steel -= b_data['steel']
+    state.buildings[b_name] += 1
+    log(state, f"Constructed {b_name}")
+
+def trade_gem(state, resource):
+    if resource not in GEM_TRADES:
+        raise ValueError(f"Unknown resource: {resource}")
+    if state.gems < 1:
+        raise ValueError("Not enough Gems!")
+    attr, amount = GEM_TRADES[resource]
+    state.gems -= 1
+    setattr(state, attr, getattr(state, attr) + amount)
+    log(state, f"Traded 1 Gem for {amount} {resource}.")
+    return amount
+
+def mine_gem(state):
+    miner = next((s for s in state.fleet_list if s['type'] == 'Destroyer' and s['status'] == 'Active' and not s.get('mined_this_turn', False)), None)
+    if miner is None:
+        raise ValueError("No Destroyers available to mine!")
+    miner['mined_this_turn'] = True
+    state.gems += 1
+    log(state, f"{miner['name']} extracted 1 Gem from the mountains.")
+    return miner
+
+
+# --- DAMAGE CONTROL ---
+def adjust_ship_hp(ship, delta):
+    ship['hp'] = max(0, min(ship['max_hp'], ship['hp'] + delta))
+    return ship['hp']
+
+def adjust_base_hp(state, delta, enemy=None):
+    if enemy is None:
+        state.base_hp = max(0, min(BASE_MAX_HP, state.base_hp + delta))
+        return state.base_hp
+    enemy_data = state.enemies[enemy]
+    enemy_data['base_hp'] = max(0, min(BASE_MAX_HP, enemy_data['base_hp'] + delta))
+    return enemy_data['base_hp']
+
+def apply_hp_changes(state, changes):
+    # Bulk Damage Control: each change is {"enemy", "ship_id", "delta", "sunk", "reward"},
+    # where enemy None means our side and ship_id None means the base. Every row is
+    # validated before anything is mutated so a bad row never leaves a half-applied batch.
+    resolved, seen = [], set()
+    for c in changes:
+        enemy = c.get('enemy')
+        if enemy is not None and enemy not in state.enemies:
+            raise ValueError(f"Unknown enemy: {enemy}")
+        ship = find_ship(state, c['ship_id'], enemy) if c.get('ship_id') else None
+        if ship is not None:
+            if (enemy, ship['id']) in seen:
+                raise ValueError(f"Ship listed more than once: {ship['name']}")
+            seen.add((enemy, ship['id']))
+        try:
+            delta = int(c.get('delta') or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid HP change: {c.get('delta')!r}")
+        resolved.append((c, enemy, ship, delta))
+
+    applied = []
+    for c, enemy, ship, delta in resolved:
+        if ship is None:
+            if delta:
+                adjust_base_hp(state, delta, enemy)
+                applied.append({"kind": "hp", "enemy": enemy, "ship": None, "delta": delta})
+            continue
+        if delta:
+            adjust_ship_hp(ship, delta)
+            applied.append({"kind": "hp", "enemy": enemy, "ship": ship, "delta": delta})
+        if c.get('sunk'):
+            if enemy is None:
+                delete_ship(state, ship['id'])
+                applied.append({"kind": "ship_lost", "enemy": None, "ship": ship})
+            else:
+                remove_enemy_ship(state, enemy, ship['id'], bool(c.get('reward')))
+                applied.append({"kind": "enemy_sunk", "enemy": enemy, "ship": ship, "reward": bool(c.get('reward'))})
+    return applied
+
+
+# --- ENEMY TRACKING ---
+def spawn_enemy_ship(state, enemy, u_type, num=None):
+    if u_type not in UNITS:
+        raise ValueError(f"Unknown unit: {u_type}")
+    enemy_data = state.enemies[enemy]
+    e_limit = UNITS[u_type]['limit']
+    if len([s for s in enemy_data['ships'] if s['type'] == u_type]) >= e_limit:
+        raise ValueError(f"{enemy} {u_type} limit reached!")
+    if num is None:
+        num = get_next_ship_number(enemy_data['ships'], u_type, e_limit)
+    name_display = f"{u_type} {num}" if u_type != "Decoy" else u_type
+
+    ship = {
+        "id": str(uuid.uuid4()),
+        "type": u_type,
+        "num": num,
+        "name": name_display,
+        "hp": UNITS[u_type]['hp'],
+        "max_hp": UNITS[u_type]['hp']
+    }
+    enemy_data['ships'].append(ship)
+    return ship
+
+def remove_enemy_ship(state, enemy, ship_id, reward):
+    ship = find_ship(state, ship_id, enemy)
+    enemy_data = state.enemies[enemy]
+    enemy_data['ships'] = [s for s in enemy_data['ships'] if s['id'] != ship_id]
+    # Losses are kept by type so hidden-fleet inference knows what the enemy has already spent.
+    enemy_data.setdefault('sunk', []).append(ship['type'])
+    if reward:
+        state.gems += 1
+        log(state, f"Sunk enemy {ship['name']}. +1 Gem awarded.")
+    else:
+        log(state, f"Enemy {ship['name']} was sunk by another player.")
+    return ship
@@ -0,0 +1,317 @@
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import sys
+import uuid
+import game_engine
+import target_solver
+
+# --- SERVER SETTINGS ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+# --- ACTIONS ---
+# Each action is a JSON object with an "op" plus arguments, e.g.
+#   {"op": "commission", "unit": "Cruiser", "rush": 0}
+#   {"op": "hp", "ship": "Destroyer 1", "delta": -3}
+#   {"op": "hp", "enemy": "Enemy 2", "ship_id": "...", "delta": -1}
+#   {"op": "spawn", "enemy": "Enemy 1", "unit": "Battleship"}
+#   {"op": "bulk_hp", "changes": [{"ship": "Destroyer 1", "delta": -2}, {"enemy": "Enemy 1", "delta": -5}]}
+#   {"op": "plan_fire", "objective": "gems"}
+# Ships can be addressed by "ship_id" or by display name via "ship".
+def resolve_ship_id(state, action, enemy=None):
+    if 'ship_id' in action:
+        return action['ship_id']
+    ships = state.fleet_list if enemy is None else state.enemies[enemy]['ships']
+    ship = next((s for s in ships if s['name'] == action.get('ship')), None)
+    if ship is None:
+        raise ValueError(f"Unknown ship: {action.get('ship')}")
+    return ship['id']
+
+def resolve_enemy(state, action):
+    enemy = action.get('enemy')
+    if enemy is not None and enemy not in state.enemies:
+        raise ValueError(f"Unknown enemy: {enemy}")
+    return enemy
+
+def op_end_turn(state, action):
+    gold_gain, steel_gain, completed = game_engine.end_turn(state)
+    return {"gold_gain": gold_gain, "steel_gain": steel_gain, "completed": completed}
+
+def op_commission(state, action):
+    return {"turns_left": game_engine.commission(state, action['unit'], int(action.get('rush', 0)))}
+
+def op_build(state, action):
+    game_engine.buy_building(state, action['building'])
+    return {"owned": state.buildings[action['building']]}
+
+def op_trade(state, action):
+    return {"received": game_engine.trade_gem(state, action.get('resource', "Gold"))}
+
+def op_mine(state, action):
+    return {"miner": game_engine.mine_gem(state)['name']}
+
+def op_hp(state, action):
+    enemy = resolve_enemy(state, action)
+    ship = game_engine.find_ship(state, resolve_ship_id(state, action, enemy), enemy)
+    return {"hp": game_engine.adjust_ship_hp(ship, int(action['delta']))}
+
+def op_base_hp(state, action):
+    return {"base_hp": game_engine.adjust_base_hp(state, int(action['delta']), resolve_enemy(state, action))}
+
+def op_spawn(state, action):
+    ship = game_engine.spawn_enemy_ship(state, resolve_enemy(state, action) or game_engine.ENEMY_NAMES[0], action['unit'], action.get('num'))
+    return {"ship_id": ship['id'], "name": ship['name']}
+
+def op_sink(state, action):
+    enemy = resolve_enemy(state, action)
+    if enemy is None:
+        ship = game_engine.delete_ship(state, resolve_ship_id(state, action))
+    else:
+        ship = game_engine.remove_enemy_ship(state, enemy, resolve_ship_id(state, action, enemy), bool(action.get('reward', True)))
+    return {"name": ship['name']}
+
+def op_bulk_hp(state, action):
+    # {"op": "bulk_hp", "changes": [{"enemy": "Enemy 1", "ship": "Cruiser 1", "delta": -4, "sunk": true, "reward": true}, ...]}
+    changes = []
+    for c in action['changes']:
+        enemy = resolve_enemy(state, c)
+        ship_id = resolve_ship_id(state, c, enemy) if ('ship_id' in c or 'ship' in c) else None
+        changes.append({**c, "enemy": enemy, "ship_id": ship_id})
+    return {"applied": len(game_engine.apply_hp_changes(state, changes))}
+
+def op_toggle(state, action):
+    return {"status": game_engine.toggle_ship_status(state, resolve_ship_id(state, action))['status']}
+
+class Job:
+    # Read-only, CPU-heavy work an action hands back so the HTTP server can run it off the
+    # event loop. Its arguments are snapshots, so later actions cannot change them.
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+def op_plan_fire(state, action):
+    # The best target assignment for every ship and bomber that can fire. The solver takes
+    # up to a few tenths of a second for a full fleet, so it runs as a Job.
+    objective = action.get('objective', "kills")
+    if objective not in target_solver.OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    return Job(target_solver.solve, target_solver.fleet_shooters(state), target_solver.enemy_targets(state), objective)
+
+ACTIONS = {
+    "end_turn": op_end_turn,
+    "commission": op_commission,
+    "build": op_build,
+    "trade": op_trade,
+    "mine": op_mine,
+    "hp": op_hp,
+    "base_hp": op_base_hp,
+    "spawn": op_spawn,
+    "sink": op_sink,
+    "bulk_hp": op_bulk_hp,
+    "toggle": op_toggle,
+    "plan_fire": op_plan_fire,
+}
+
+
+# --- GAME REGISTRY ---
+class GameRegistry:
+    # All games live in one process. Actions are synchronous and never await, so the
+    # event loop serialises them per request without any locking.
+    def __init__(self):
+        self.games = {}
+
+    def create(self):
+        game_id = str(uuid.uuid4())
+        self.games[game_id] = game_engine.new_game()
+        return game_id
+
+    def get(self, game_id):
+        if game_id not in self.games:
+            raise KeyError(game_id)
+        return self.games[game_id]
+
+    def apply(self, game_id, actions, jobs=None):
+        # Failures are reported per action; earlier actions in the batch stay applied. Jobs
+        # run inline unless a jobs list is passed, in which case (result, job) pairs are
+        # appended for the caller to run and merge into result.
+        state = self.get(game_id)
+        if not isinstance(actions, list):
+            raise ValueError("actions must be a list")
+        results = []
+        for action in actions:
+            if not isinstance(action, dict):
+                results.append({"ok": False, "error": f"Action must be an object: {action!r}"})
+                continue
+            handler = ACTIONS.get(action.get('op'))
+            if handler is None:
+                results.append({"ok": False, "error": f"Unknown op: {action.get('op')}"})
+                continue
+            try:
+                out = handler(state, action)
+                if isinstance(out, Job):
+                    if jobs is None:
+                        out = out.fn(*out.args)
+                    else:
+                        result = {"ok": True}
+                        jobs.append((result, out))
+                        results.append(result)
+                        continue
+                results.append({"ok": True, **out})
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                results.append({"ok": False, "error": str(e)})
+        return results
+
+
+def summary(state, full=False):
+    data = {"gold": state.gold, "steel": state.steel, "gems": state.gems, "turn": state.turn, "base_hp": state.base_hp}
+    if full:
+        data.update({
+            "queue": state.queue,
+            "buildings": state.buildings,
+            "fleet_list": state.fleet_list,
+            "enemies": state.enemies,
+            "logs": state.logs[:50],
+        })
+    return data
+
+
+# --- HTTP ---
+# Routes:
+#   POST   /games                 -> create a game
+#   GET    /games/<id>            -> full state
+#   DELETE /games/<id>            -> drop a game
+#   POST   /games/<id>/actions    -> {"actions": [...]} applied in order
+#   POST   /batch                 -> {"games": {"<id>": [...], ...}} across many games
+def route(registry, method, path, body, jobs=None):
+    parts = [p for p in path.split("?")[0].split("/") if p]
+    if parts == ["games"] and method == "POST":
+        game_id = registry.create()
+        return 201, {"game_id": game_id, "state": summary(registry.get(game_id), full=True)}
+    if parts == ["games"] and method == "GET":
+        return 200, {"games": list(registry.games.keys())}
+    if len(parts) == 2 and parts[0] == "games":
+        if method == "GET":
+            return 200, summary(registry.get(parts[1]), full=True)
+        if method == "DELETE":
+            registry.get(parts[1])
+            del registry.games[parts[1]]
+            return 200, {"deleted": parts[1]}
+    if len(parts) == 3 and parts[0] == "games" and parts[2] == "actions" and method == "POST":
+        actions = body.get('actions', [body] if 'op' in body else [])
+        results = registry.apply(parts[1], actions, jobs)
+        return 200, {"results": results, "state": summary(registry.get(parts[1]))}
+    if parts == ["batch"] and method == "POST":
+        out = {}
+        for game_id, actions in body.get('games', {}).items():
+            try:
+                out[game_id] = {"results": registry.apply(game_id, actions, jobs), "state": summary(registry.get(game_id))}
+            except KeyError:
+                out[game_id] = {"error": f"Unknown game: {game_id}"}
+            except ValueError as e:
+                out[game_id] = {"error": str(e)}
+        return 200, {"games": out}
+    return 404, {"error": f"No route for {method} {path}"}
+
+async def run_jobs(executor, jobs):
+    loop = asyncio.get_running_loop()
+    outputs = await asyncio.gather(*(loop.run_in_executor(executor, job.fn, *job.args) for _, job in jobs), return_exceptions=True)
+    for (result, _), output in zip(jobs, outputs):
+        if isinstance(output, Exception):
+            result.update({"ok": False, "error": str(output)})
+        else:
+            result.update(output)
+
+async def handle_connection(registry, executor, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                status, payload = 413, {"error": "Request body too large"}
+                await reader.readexactly(length)
+            else:
+                raw = await reader.readexactly(length) if length else b""
+                jobs = []
+                try:
+                    status, payload = route(registry, method, path, json.loads(raw) if raw else {}, jobs)
+                    await run_jobs(executor, jobs)
+                except KeyError as e:
+                    status, payload = 404, {"error": f"Unknown game: {e.args[0]}"}
+                except (ValueError, AttributeError) as e:
+                    status, payload = 400, {"error": str(e)}
+
+            data = json.dumps(payload).encode()
+            keep_alive = headers.get("connection", "").lower() != "close"
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, registry=None):
+    registry = registry or GameRegistry()
+    with ProcessPoolExecutor() as executor:
+        server = await asyncio.start_server(lambda r, w: handle_connection(registry, executor, r, w), host, port)
+        print(f"Battleship headless API listening on http://{host}:{server.sockets[0].getsockname()[1]}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+# --- STDIO ---
+# One JSON object per line: {"game_id": "<id or omitted for a new game>", "actions": [...]}.
+def serve_stdio(registry=None):
+    registry = registry or GameRegistry()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            game_id = request.get('game_id') or registry.create()
+            results = registry.apply(game_id, request.get('actions', []))
+            response = {"game_id": game_id, "results": results, "state": summary(registry.get(game_id))}
+        except KeyError as e:
+            response = {"error": f"Unknown game: {e.args[0]}"}
+        except ValueError as e:
+            response = {"error": str(e)}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Battleship Command API for bots and tools.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--stdio", action="store_true", help="Read JSON-line batches from stdin instead of serving HTTP.")
+    args = parser.parse_args()
+    if args.stdio:
+        serve_stdio()
+    else:
+        try:
+            asyncio.run(serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import random
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Dataframe
+
+# --- LOAD TEST SETTINGS ---
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "battleship_app.py")
+DEFAULT_LEVELS = [1, 2, 4, 8, 16, 32]
+DEFAULT_TURNS = 8
+DEGRADE_FACTOR = 2.0
+DEFAULT_THINK = 0.3
+WIDGET_KINDS = ("button", "number_input", "selectbox", "radio", "checkbox", "slider", "text_input", "toggle")
+
+
+# --- MEASUREMENT HELPERS ---
+def deep_sizeof(obj, seen=None):
+    # Rough per-session footprint: follows containers and object attributes, counting each
+    # object once. Arrays and DataFrames report their buffers, which getsizeof can miss.
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        # getsizeof includes the buffer only for arrays that own it; views count their base once.
+        return sys.getsizeof(obj) + (deep_sizeof(obj.base, seen) if obj.base is not None else 0)
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+def widget_count(at):
+    return sum(len(getattr(at, kind)) for kind in WIDGET_KINDS)
+
+
+# --- SIMULATED SESSION ---
+# AppTest swaps process-wide runtime state on every run, so reruns take this lock. That
+# also mirrors a single Streamlit server process, where the GIL serialises CPU-bound
+# reruns across session threads; measured latency includes the time spent queued.
+RERUN_LOCK = threading.Lock()
+
+class Session:
+    def __init__(self, seed, think, bulk):
+        self.at = AppTest.from_file(APP_PATH, default_timeout=120)
+        self.rng = random.Random(seed)
+        self.think = think
+        self.bulk = bulk
+        self.latencies = []
+        self.widgets = []
+
+    def rerun(self):
+        start = time.perf_counter()
+        with RERUN_LOCK:
+            self.at.run()
+        self.latencies.append(time.perf_counter() - start)
+        self.widgets.append(widget_count(self.at))
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def click(self, label=None, key=None):
+        for b in self.at.button:
+            if (key is not None and b.key == key) or (key is None and b.label.startswith(label)):
+                if b.disabled:
+                    return False
+                if self.think:
+                    time.sleep(self.rng.expovariate(1 / self.think))
+                b.click()
+                self.rerun()
+                return True
+        return False
+
+    def submit_bulk_edits(self, edits):
+        # AppTest has no data_editor API, so the edits ride along as the editor's widget state
+        # on the submit rerun, exactly as the browser would send them.
+        tree = self.at._tree
+        editor = next(n for n in tree if isinstance(n, Dataframe) and n.proto.form_id.startswith("bulk_hp_form"))
+        widget_states = tree.get_widget_states
+
+        def with_edits():
+            ws = widget_states()
+            w = ws.widgets.add()
+            w.id = editor.proto.id
+            w.string_value = json.dumps({
+                "edited_rows": {str(row): {"Δ HP": delta} for row, delta in edits.items()},
+                "added_rows": [], "deleted_rows": [],
+            })
+            return ws
+
+        tree.get_widget_states = with_edits
+        self.click("Apply Changes")
+
+    def bulk_row(self, enemy=None, ship_id=None):
+        # Row order of build_hp_table(): our base, our ships, then each enemy's base and ships.
+        state = self.at.session_state
+        rows = [(None, None)] + [(None, s['id']) for s in state.fleet_list]
+        for e_name, e_data in state.enemies.items():
+            rows += [(e_name, None)] + [(e_name, s['id']) for s in e_data['ships']]
+        return rows.index((enemy, ship_id))
+
+    def play_turn(self):
+        # One realistic turn: mine, roll some attacks, buy something, track the enemy, take a hit, end turn.
+        self.click("⛏️ Mine Mountain")
+        self.click("🔥 Battleship")
+        self.click("🔫 Destroyer")
+
+        blueprint = next(s for s in self.at.selectbox if s.label == "Build Blueprint")
+        blueprint.set_value(self.rng.choice(["Destroyer", "Cruiser", "Torpedo Boat"]))
+        self.rerun()
+        self.click("Commission")
+
+        enemy = self.rng.choice(["Enemy 1", "Enemy 2", "Enemy 3"])
+        self.click(key=f"spawn_{enemy}")
+        # The same two hits either way: one on a spotted enemy ship, one on our own active ship.
+        enemy_ships = self.at.session_state.enemies[enemy]['ships']
+        enemy_hit = self.rng.choice(enemy_ships)['id'] if enemy_ships else None
+        active = [s for s in self.at.session_state.fleet_list if s['status'] == "Active"]
+        own_hit = self.rng.choice(active)['id'] if active else None
+        if self.bulk:
+            edits = {}
+            if enemy_hit:
+                edits[self.bulk_row(enemy, enemy_hit)] = -1
+            if own_hit:
+                edits[self.bulk_row(ship_id=own_hit)] = -1
+            self.submit_bulk_edits(edits)
+        else:
+            if enemy_hit:
+                self.click(key=f"e_dmg_{enemy_hit}")
+            if own_hit:
+                self.click(key=f"dmg_{own_hit}")
+
+        self.click("End Turn")
+        self.click("✅ Confirm")
+
+    def footprint(self):
+        state = self.at.session_state.to_dict()
+        return {
+            "total": deep_sizeof(state),
+            "history": deep_sizeof(state.get('history', [])),
+            "logs": deep_sizeof(state.get('logs', [])),
+        }
+
+
+def run_level(sessions, turns, workers, think, bulk=False):
+    pool_size = workers or sessions
+    group = [Session(seed=i, think=think, bulk=bulk) for i in range(sessions)]
+
+    def play(session):
+        session.rerun()
+        if bulk:
+            session.at.toggle(key="bulk_hp_mode").set_value(True)
+            session.rerun()
+        for _ in range(turns):
+            session.play_turn()
+        return session
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool_size) as pool:
+        list(pool.map(play, group))
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    latencies = [lat for s in group for lat in s.latencies]
+    widgets = [w for s in group for w in s.widgets]
+    footprints = [s.footprint() for s in group]
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "cpu_pct": 100 * cpu / wall,
+        "reruns_per_s": len(latencies) / wall,
+        "widgets": sum(widgets) / len(widgets),
+        "mem_kb": sum(f['total'] for f in footprints) / len(footprints) / 1024,
+        "history_kb": sum(f['history'] for f in footprints) / len(footprints) / 1024,
+        "logs_kb": sum(f['logs'] for f in footprints) / len(footprints) / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Battleship Streamlit app.")
+    parser.add_argument("--levels", type=int, nargs="+", default=DEFAULT_LEVELS, help="Session counts to ramp through.")
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS, help="Scripted turns played by every session.")
+    parser.add_argument("--workers", type=int, default=0, help="Rerun threads (default: one per session, like the Streamlit server).")
+    parser.add_argument("--think", type=float, default=DEFAULT_THINK, help="Mean seconds a simulated player waits between clicks (0 = flat out).")
+    parser.add_argument("--bulk", action="store_true", help="Play with Damage Control bulk edit mode on.")
+    parser.add_argument("--degrade", type=float, default=DEGRADE_FACTOR, help="p95 multiple of the 1-session baseline that counts as degraded.")
+    args = parser.parse_args()
+
+    # Sessions write analytics exports and archives relative to the working directory.
+    os.chdir(tempfile.mkdtemp(prefix="battleship_load_"))
+
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cpu %':>6} {'rerun/s':>8} "
+          f"{'widgets':>8} {'mem KB':>8} {'hist KB':>8} {'logs KB':>8}")
+    baseline, degraded_at = None, None
+    for level in args.levels:
+        r = run_level(level, args.turns, args.workers, args.think, args.bulk)
+        print(f"{r['sessions']:>8} {r['reruns']:>7} {r['p50'] * 1000:>8.1f} {r['p95'] * 1000:>8.1f} {r['p99'] * 1000:>8.1f} "
+              f"{r['cpu_pct']:>6.0f} {r['reruns_per_s']:>8.1f} {r['widgets']:>8.1f} {r['mem_kb']:>8.1f} "
+              f"{r['history_kb']:>8.1f} {r['logs_kb']:>8.1f}", flush=True)
+        baseline = baseline or r['p95']
+        if degraded_at is None and r['p95'] > args.degrade * baseline:
+            degraded_at = level
+
+    if degraded_at is None:
+        print(f"No degradation beyond {args.degrade:.1f}x baseline p95 up to {args.levels[-1]} sessions.")
+    else:
+        print(f"Latency degraded at {degraded_at} concurrent sessions (p95 > {args.degrade:.1f}x the {args.levels[0]}-session baseline).")
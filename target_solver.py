@@ -0,0 +1,184 @@
+import itertools
+import numpy as np
+
+# --- DAMAGE MODEL ---
+# Every attack a shooter can make: weapon class and its equally likely rolls.
+ATTACKS = {
+    "Carrier Strike": ("Aircraft", list(range(3, 11))),
+    "Carrier Squadron": ("Aircraft", list(range(1, 6))),
+    "Battleship": ("Guns", list(range(2, 8))),
+    "Cruiser": ("Guns", list(range(2, 5))),
+    "Destroyer": ("Guns", list(range(1, 4))),
+    "Torpedo Boat": ("Torpedo", list(range(2, 8))),
+    "Submarine": ("Torpedo", [7]),
+    "Bomber": ("Aircraft", list(range(2, 5))),
+    "Combined Sortie": ("Aircraft", [a + b for a in range(2, 5) for b in range(2, 5)]),
+}
+
+# The UNITS bonuses as numbers. Reductions apply per hit and are keyed by the target type,
+# then by weapon class or attacking unit; multipliers by (attacker, target type).
+REDUCTIONS = {
+    "Battleship": {"Torpedo": 3, "Aircraft": 1},
+    "Cruiser": {"Submarine": 5},
+    "Destroyer": {"Aircraft": 2},
+}
+MULTIPLIERS = {
+    ("Destroyer", "Submarine"): 2,
+    ("Destroyer", "Torpedo Boat"): 2,
+    ("Battleship", "Submarine"): 0,
+}
+NO_BASE_ATTACKS = {"Submarine"}
+
+# Expected damage (as a share of target HP) only breaks near-ties, e.g. when nothing can be sunk.
+DAMAGE_TIEBREAK = 1e-4
+OBJECTIVES = ("kills", "gems")
+
+
+def hit_damage(attack, target_type, roll):
+    weapon = ATTACKS[attack][0]
+    reduction = REDUCTIONS.get(target_type, {})
+    dmg = roll * MULTIPLIERS.get((attack, target_type), 1)
+    return max(0, dmg - reduction.get(weapon, 0) - reduction.get(attack, 0))
+
+def hit_pmf(attack, target_type, hp):
+    # Damage distribution of one attack, with everything at or above the target's HP folded into index hp.
+    rolls = ATTACKS[attack][1]
+    pmf = np.zeros(hp + 1)
+    for roll in rolls:
+        pmf[min(hp, hit_damage(attack, target_type, roll))] += 1 / len(rolls)
+    return pmf
+
+
+# --- SHOOTERS AND TARGETS ---
+def fleet_shooters(state):
+    # Active ships that can fire this turn (mining Destroyers sit out), plus base bombers.
+    shooters = [
+        {"name": s['name'], "unit": s['type']} for s in state.fleet_list
+        if s['status'] == "Active" and (s['type'] in ATTACKS or s['type'] == "Aircraft Carrier")
+        and not s.get('mined_this_turn', False)
+    ]
+    shooters += [{"name": f"Bomber {i + 1}", "unit": "Base Defense"} for i in range(state.buildings.get("Base Defense", 0))]
+    return shooters
+
+def enemy_targets(state):
+    # Labels match the Combat tab's target picker.
+    targets = []
+    for e_name, e_data in state.enemies.items():
+        if e_data['base_hp'] > 0:
+            targets.append({"label": f"{e_name} Base", "type": "Base", "hp": e_data['base_hp'], "gems": 0})
+        for ship in e_data['ships']:
+            if ship['hp'] > 0:
+                targets.append({"label": f"{e_name} · {ship['name']}", "type": ship['type'], "hp": ship['hp'], "gems": 1})
+    return targets
+
+def firing_options(shooters):
+    # Carriers can strike focused or split into two squadrons, and a pair of bombers can fly a
+    # combined sortie. Yields every distinct mix as a list of (shooter label, attack).
+    carriers = [s['name'] for s in shooters if s['unit'] == "Aircraft Carrier"]
+    bombers = [s['name'] for s in shooters if s['unit'] == "Base Defense"]
+    ships = [(s['name'], s['unit']) for s in shooters if s['unit'] not in ("Aircraft Carrier", "Base Defense")]
+
+    bomber_options = [[(name, "Bomber") for name in bombers]]
+    if len(bombers) == 2:
+        bomber_options.append([(" + ".join(bombers), "Combined Sortie")])
+    for split, bomber_attacks in itertools.product(range(len(carriers) + 1), bomber_options):
+        attacks = [(name, "Carrier Strike") for name in carriers[:len(carriers) - split]]
+        for name in carriers[len(carriers) - split:]:
+            attacks += [(f"{name} (Sqd A)", "Carrier Squadron"), (f"{name} (Sqd B)", "Carrier Squadron")]
+        yield attacks + ships + bomber_attacks
+
+
+# --- SOLVER ---
+def allocation_values(target, kinds, states, strides, weight):
+    # Exact damage distribution for every allocation of attacks to this target, built
+    # incrementally: each allocation is a smaller one convolved with one more hit.
+    hp = target['hp']
+    hits = [hit_pmf(kind, target['type'], hp) for kind in kinds]
+    pmfs = np.zeros((len(states), hp + 1))
+    pmfs[0, 0] = 1.0
+    for s in range(1, len(states)):
+        k = max(i for i, c in enumerate(states[s]) if c)
+        conv = np.convolve(pmfs[s - strides[k]], hits[k])
+        pmfs[s, :hp] = conv[:hp]
+        pmfs[s, hp] = conv[hp:].sum()
+    p_kill = pmfs[:, hp]
+    exp_dmg = pmfs @ np.arange(hp + 1)
+    return weight * p_kill + DAMAGE_TIEBREAK * exp_dmg / hp, p_kill, exp_dmg
+
+def solve_counts(kinds, counts, targets, objective):
+    # DP over targets: best[s] is the best total from the remaining targets using the attack
+    # counts encoded by state s (mixed radix). Identical attacks are interchangeable, so states
+    # are count vectors rather than shooter subsets.
+    radix = [c + 1 for c in counts]
+    strides = [int(np.prod(radix[i + 1:])) for i in range(len(radix))]
+    states = list(itertools.product(*(range(r) for r in radix)))
+    state_arr = np.array(states).reshape(len(states), len(kinds))
+    fits = [np.nonzero((state_arr >= state_arr[a]).all(axis=1))[0] for a in range(len(states))]
+    no_base = np.array([kind in NO_BASE_ATTACKS for kind in kinds], dtype=bool)
+
+    memo = {}
+    best = np.zeros(len(states))
+    choices, details = [], []
+    for target in reversed(targets):
+        weight = 1.0 if objective == "kills" else target['gems']
+        key = (target['type'], target['hp'], weight)
+        if key not in memo:
+            memo[key] = allocation_values(target, kinds, states, strides, weight)
+        values, p_kill, exp_dmg = memo[key]
+
+        allowed = range(len(states))
+        if target['type'] == "Base" and no_base.any():
+            allowed = np.nonzero(state_arr[:, no_base].sum(axis=1) == 0)[0]
+        new_best = np.full(len(states), -np.inf)
+        choice = np.zeros(len(states), dtype=np.int64)
+        for a in allowed:
+            s_idx = fits[a]
+            cand = values[a] + best[s_idx - a]
+            better = cand > new_best[s_idx]
+            new_best[s_idx[better]] = cand[better]
+            choice[s_idx[better]] = a
+        best = new_best
+        choices.append(choice)
+        details.append((p_kill, exp_dmg))
+    choices.reverse()
+    details.reverse()
+
+    s, plan = len(states) - 1, []
+    for choice, (p_kill, exp_dmg) in zip(choices, details):
+        a = int(choice[s])
+        plan.append((states[a], float(p_kill[a]), float(exp_dmg[a])))
+        s -= a
+    return float(best[-1]), plan
+
+def solve(shooters, targets, objective="kills"):
+    # Assigns every shooter to at most one target, maximising expected kills or expected gems.
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    best = None
+    for attacks in firing_options(shooters):
+        kinds = sorted({kind for _, kind in attacks})
+        counts = [sum(1 for _, k in attacks if k == kind) for kind in kinds]
+        score, plan = solve_counts(kinds, counts, targets, objective)
+        if best is None or score > best[0]:
+            best = (score, attacks, kinds, plan)
+    score, attacks, kinds, plan = best
+
+    pool = {kind: [name for name, k in attacks if k == kind] for kind in kinds}
+    rows = []
+    for target, (alloc, p_kill, exp_dmg) in zip(targets, plan):
+        assigned = []
+        for kind, n in zip(kinds, alloc):
+            assigned += [(pool[kind].pop(0), kind) for _ in range(n)]
+        if assigned:
+            rows.append({"target": target['label'], "shooters": assigned, "p_kill": p_kill, "expected_damage": exp_dmg,
+                         "gems": target['gems']})
+    return {
+        "objective": objective,
+        "expected_kills": sum(r['p_kill'] for r in rows),
+        "expected_gems": sum(r['p_kill'] * r['gems'] for r in rows),
+        "assignments": rows,
+        "idle": [name for names in pool.values() for name in names],
+    }
+
+def plan_fire(state, objective="kills", targets=None):
+    return solve(fleet_shooters(state), enemy_targets(state) if targets is None else targets, objective)